@@ -1,12 +1,20 @@
 import streamlit as st
 import dropbox
-import re
+import os
+import time
 
-try:
-    from docx import Document
-except ImportError:
-    st.error("Missing library: Please add 'python-docx' to your requirements.txt")
-    st.stop()
+from admatcher_core import (
+    DEFAULT_THUMBNAIL_SIZE,
+    THUMBNAIL_SIZES,
+    BrandClassifier,
+    SharedDropboxIndex,
+    TemporaryLinkCache,
+    ThumbnailCache,
+    iter_ad_records,
+    iter_docx_paragraphs,
+    load_brand_rules,
+    snapshot_path_for_account,
+)
 
 # ----------------------------
 # Page setup
@@ -19,29 +27,46 @@ except st.errors.StreamlitAPIException:
 
 st.title("🎯 Ad Matcher")
 
+PAGE_SIZE_OPTIONS = [5, 10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 10
+
 # ----------------------------
 # Dropbox client
 # ----------------------------
-# NOTE:
-# If your secret is truly a refresh_token, Dropbox SDK usually needs an OAuth flow.
-# Many setups actually store an ACCESS TOKEN here. We'll keep your naming but add a helpful error.
-try:
-    DROPBOX_TOKEN = st.secrets["dropbox"]["refresh_token"]
-except Exception:
-    st.error("🔑 Dropbox Configuration Error. Missing st.secrets['dropbox']['refresh_token'].")
-    st.stop()
+# ADMATCHER_BACKEND=fake swaps in an offline, synthetic Dropbox (fake_dropbox.py)
+# so the tool can be exercised without an account. Default is the real API.
+STORAGE_BACKEND = os.environ.get("ADMATCHER_BACKEND", "dropbox").lower()
 
-try:
-    dbx = dropbox.Dropbox(DROPBOX_TOKEN)
-    # Lightweight check
-    dbx.users_get_current_account()
-except Exception as e:
-    st.error(
-        "🔑 Dropbox Authentication Error.\n\n"
-        "Your token may be invalid or it might be a *refresh token* being used as an *access token*.\n"
-        f"Details: {e}"
+if STORAGE_BACKEND == "fake":
+    from fake_dropbox import FakeDropbox
+
+    dbx = FakeDropbox(
+        n_files=int(os.environ.get("ADMATCHER_FAKE_FILES", "10000")),
+        latency=float(os.environ.get("ADMATCHER_FAKE_LATENCY", "0")),
     )
-    st.stop()
+    dropbox_account = dbx.users_get_current_account()
+    st.caption("🧪 Using the offline fake Dropbox backend.")
+else:
+    # NOTE:
+    # If your secret is truly a refresh_token, Dropbox SDK usually needs an OAuth flow.
+    # Many setups actually store an ACCESS TOKEN here. We'll keep your naming but add a helpful error.
+    try:
+        DROPBOX_TOKEN = st.secrets["dropbox"]["refresh_token"]
+    except Exception:
+        st.error("🔑 Dropbox Configuration Error. Missing st.secrets['dropbox']['refresh_token'].")
+        st.stop()
+
+    try:
+        dbx = dropbox.Dropbox(DROPBOX_TOKEN)
+        # Lightweight check
+        dropbox_account = dbx.users_get_current_account()
+    except Exception as e:
+        st.error(
+            "🔑 Dropbox Authentication Error.\n\n"
+            "Your token may be invalid or it might be a *refresh token* being used as an *access token*.\n"
+            f"Details: {e}"
+        )
+        st.stop()
 
 # ----------------------------
 # Upload
@@ -54,64 +79,66 @@ uploaded_docx = st.file_uploader(
 
 if uploaded_docx:
     # ----------------------------
-    # Index Dropbox once
+    # Index Dropbox (shared across sessions, incremental)
     # ----------------------------
-    with st.spinner("🔍 Indexing Dropbox Assets..."):
+    # One index per process and account: the first session builds it, later
+    # refreshes only fetch what changed since the stored cursor, and every
+    # session reads the same published copy.
+    @st.cache_resource(show_spinner=False)
+    def get_shared_dropbox_index(index_path: str):
+        return SharedDropboxIndex(index_path)
+
+    shared_index = get_shared_dropbox_index(snapshot_path_for_account(dropbox_account.account_id))
+
+    spinner_text = (
+        "🔍 Syncing Dropbox changes..." if shared_index.is_built
+        else "🔍 Indexing Dropbox Assets (first run, this can take a while)..."
+    )
+    force_sync = st.sidebar.button("🔄 Sync Dropbox now", key="admatcher_force_sync")
+    with st.spinner(spinner_text):
         try:
-            result = dbx.files_list_folder("", recursive=True)
-            all_files = list(result.entries)
-            while result.has_more:
-                result = dbx.files_list_folder_continue(result.cursor)
-                all_files.extend(result.entries)
+            index_view = shared_index.refresh(dbx, force=force_sync)
         except Exception as e:
             st.error(f"Dropbox Access Error: {e}")
             st.stop()
 
+    if index_view is None:
+        st.error("Dropbox index is not available yet. Please try again in a moment.")
+        st.stop()
+
+    st.sidebar.caption(
+        f"Shared index: {len(index_view.files):,} files · "
+        f"~{index_view.approx_bytes / (1024 * 1024):.1f} MB · "
+        f"synced {time.strftime('%H:%M:%S', time.localtime(index_view.refreshed_at))}"
+    )
+
     # ----------------------------
-    # Parse DOCX into ads
+    # Parse DOCX into ads (streamed from document.xml, tables included)
     # ----------------------------
-    doc = Document(uploaded_docx)
-    full_text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-
-    # Split where an 8-digit code occurs, keeping the delimiter
-    chunks = re.split(r"(\b\d{8}\b)", full_text)
-
-    ad_data = []
-
-    def get_parent_brand(text: str) -> str:
-        text = (text or "").lower()
-        if any(x in text for x in ["bell", "bce", "ctv"]):
-            return "Bell"
-        if "telus" in text:
-            return "Telus"
-        if "fizz" in text:
-            return "Fizz"
-        if "videotron" in text or "quebecor" in text:
-            return "Videotron"
-        if "freedom" in text:
-            return "Freedom"
-        return "Other"
-
-    for i in range(1, len(chunks), 2):
-        code = chunks[i].strip()
-        details = chunks[i + 1] if i + 1 < len(chunks) else ""
-
-        brand_match = re.search(r"Brand[s]?:\s*(.*)", details)
-        original_brand = brand_match.group(1).strip() if brand_match else "Unknown"
-        parent_brand = get_parent_brand(original_brand)
-
-        media_match = re.search(r"Media Outlet:\s*(.*)", details)
-        media_name = media_match.group(1).strip() if media_match else "Unknown"
-
-        ad_data.append(
-            {
-                "code": code,
-                "parent_brand": parent_brand,
-                "original_brand": original_brand,
-                "media": media_name,
-                "details": details.strip(),
-            }
-        )
+    # Parent brands come from brand_rules.json (keywords/aliases -> parent brand)
+    if "admatcher_brand_classifier" not in st.session_state:
+        try:
+            st.session_state["admatcher_brand_classifier"] = BrandClassifier(load_brand_rules())
+        except Exception as e:
+            st.error(f"Could not load brand rules: {e}")
+            st.stop()
+    brand_classifier = st.session_state["admatcher_brand_classifier"]
+    get_parent_brand = brand_classifier.classify
+
+    # file_id changes on every upload, even of a same-named, same-sized revision
+    docx_key = uploaded_docx.file_id
+    if st.session_state.get("admatcher_docx_key") != docx_key:
+        try:
+            ad_data = []
+            for record in iter_ad_records(iter_docx_paragraphs(uploaded_docx)):
+                record["parent_brand"] = get_parent_brand(record["original_brand"])
+                ad_data.append(record)
+        except Exception as e:
+            st.error(f"Could not read Word document: {e}")
+            st.stop()
+        st.session_state["admatcher_ads"] = ad_data
+        st.session_state["admatcher_docx_key"] = docx_key
+    ad_data = st.session_state["admatcher_ads"]
 
     # ----------------------------
     # Sidebar filters
@@ -119,9 +146,27 @@ if uploaded_docx:
     st.sidebar.header("🔍 Filter Settings")
     brand_filter = st.sidebar.selectbox(
         "Select Parent Brand:",
-        ["All", "Bell", "Telus", "Fizz", "Videotron", "Freedom", "Other"],
+        ["All"] + brand_classifier.options(),
         key="admatcher_brand_filter",
     )
+    page_size = st.sidebar.selectbox(
+        "Ads per page:",
+        PAGE_SIZE_OPTIONS,
+        index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE),
+        key="admatcher_page_size",
+    )
+    image_preview_mode = st.sidebar.radio(
+        "Image previews:",
+        ["Thumbnails", "Full resolution"],
+        key="admatcher_image_preview_mode",
+    )
+    thumbnail_size = st.sidebar.selectbox(
+        "Thumbnail size:",
+        THUMBNAIL_SIZES,
+        index=THUMBNAIL_SIZES.index(DEFAULT_THUMBNAIL_SIZE),
+        key="admatcher_thumbnail_size",
+        disabled=image_preview_mode != "Thumbnails",
+    )
 
     filtered_ads = [
         ad for ad in ad_data
@@ -131,20 +176,61 @@ if uploaded_docx:
     st.divider()
     st.subheader(f"Found {len(filtered_ads)} ads for {brand_filter}")
 
+    # ----------------------------
+    # Pagination: only the visible page resolves links and renders media
+    # ----------------------------
+    total_pages = max(1, -(-len(filtered_ads) // page_size))
+    page = st.number_input(
+        f"Page (of {total_pages})",
+        min_value=1,
+        max_value=total_pages,
+        value=1,
+        step=1,
+        key=f"admatcher_page_{brand_filter}_{page_size}",
+    )
+    page_start = (page - 1) * page_size
+    page_ads = filtered_ads[page_start:page_start + page_size]
+    next_page_ads = filtered_ads[page_start + page_size:page_start + 2 * page_size]
+    st.caption(f"Showing ads {page_start + 1}–{page_start + len(page_ads)} of {len(filtered_ads)}")
+
     # ----------------------------
     # Helper: find file by code
     # ----------------------------
+    code_index = index_view.code_index
+
     def find_dropbox_file_for_code(code: str):
-        # Looks for file name containing the 8-digit code anywhere
-        for f in all_files:
-            if isinstance(f, dropbox.files.FileMetadata) and code in f.name:
-                return f
-        return None
+        # First file whose name contains the 8-digit code (indexed lookup)
+        return code_index.find(code)
+
+    # ----------------------------
+    # Resolve temp links (parallel, cached across reruns)
+    # ----------------------------
+    if "admatcher_link_cache" not in st.session_state:
+        st.session_state["admatcher_link_cache"] = TemporaryLinkCache()
+    link_cache = st.session_state["admatcher_link_cache"]
+    link_cache.prune()
+
+    matches = {ad["code"]: find_dropbox_file_for_code(ad["code"]) for ad in page_ads}
+    with st.spinner("🔗 Preparing previews..."):
+        temp_links = link_cache.resolve_many(dbx, [m for m in matches.values() if m])
+
+    # Image thumbnails in batches of 25, cached on disk by rev
+    thumbnails = {}
+    if image_preview_mode == "Thumbnails":
+        thumbnail_cache = ThumbnailCache(thumbnail_size)
+        image_matches = [m for m in matches.values() if m and ThumbnailCache.supports(m)]
+        if image_matches:
+            with st.spinner("🖼️ Loading thumbnails..."):
+                thumbnails = thumbnail_cache.get_many(dbx, image_matches)
+
+    # Warm the next page in the background so paging forward is instant
+    next_matches = [find_dropbox_file_for_code(ad["code"]) for ad in next_page_ads]
+    link_cache.prefetch(dbx, [m for m in next_matches if m])
 
     # ----------------------------
     # Display results
     # ----------------------------
-    for idx, ad in enumerate(filtered_ads):
+    for idx, ad in enumerate(page_ads, start=page_start):
         code = ad["code"]
         uid = f"{idx}_{code}"
 
@@ -165,17 +251,16 @@ if uploaded_docx:
                 )
 
             with col_media:
-                match = find_dropbox_file_for_code(code)
+                match = matches.get(code)
 
                 if not match:
                     st.warning(f"⚠️ Code {code} not found in Dropbox.")
                     continue
 
-                # Step 1: get temp link (separate try so UI errors don't look like Dropbox errors)
-                try:
-                    temp_link = dbx.files_get_temporary_link(match.path_lower).link
-                except Exception as e:
-                    st.error(f"Dropbox temp link error for {code}: {e}")
+                # Step 1: get temp link (resolved above; errors kept separate from UI errors)
+                temp_link = temp_links.get(TemporaryLinkCache.key_for(match))
+                if isinstance(temp_link, Exception) or not temp_link:
+                    st.error(f"Dropbox temp link error for {code}: {temp_link}")
                     continue
 
                 # Step 2: preview media
@@ -186,6 +271,18 @@ if uploaded_docx:
                         st.audio(temp_link, format="audio/mp3")
                     elif fname.endswith((".mp4", ".mov")):
                         st.video(temp_link)
+                    elif TemporaryLinkCache.key_for(match) in thumbnails:
+                        thumb = thumbnails[TemporaryLinkCache.key_for(match)]
+                        show_full = st.checkbox(
+                            "Load full resolution",
+                            key=f"admatcher_full_res_{uid}",
+                        )
+                        if show_full:
+                            st.image(temp_link)
+                        elif isinstance(thumb, Exception):
+                            st.caption(f"Thumbnail unavailable for {code}: {thumb}")
+                        else:
+                            st.image(thumb)
                     else:
                         st.image(temp_link)
                 except Exception as e:
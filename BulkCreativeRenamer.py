@@ -2,25 +2,13 @@ import streamlit as st
 import pandas as pd
 import zipfile
 import io
-import re
 from pathlib import PurePosixPath
 
+from renamer_core import parse_bulk_filenames
+
 st.title("Bulk Creative Renamer")
 st.caption("Upload a ZIP, add version history to creative names, and download a renamed ZIP.")
 
-VERSION_SUFFIX_PATTERN = re.compile(r"^(.*?)(?:_(v\d+))?$", re.IGNORECASE)
-
-EXPECTED_COMPONENTS = [
-    "year",
-    "client",
-    "lob",
-    "lang",
-    "campaign",
-    "message",
-    "size",
-    "date_part",
-]
-
 REQUIRED_COLUMNS = [
     "original_path",
     "folder",
@@ -38,44 +26,6 @@ REQUIRED_COLUMNS = [
 ]
 
 
-def split_stem_and_ext(filename: str):
-    p = PurePosixPath(filename)
-    return p.stem, p.suffix
-
-
-def parse_filename(filename: str):
-    stem, ext = split_stem_and_ext(filename)
-
-    m = VERSION_SUFFIX_PATTERN.match(stem)
-    if m:
-        base_stem = m.group(1) or ""
-        version = m.group(2) or ""
-    else:
-        base_stem = stem
-        version = ""
-
-    parts = base_stem.split("_")
-
-    parsed = {k: "" for k in EXPECTED_COMPONENTS}
-    parsed["ext"] = ext
-    parsed["version"] = version
-
-    if len(parts) >= 8:
-        parsed["year"] = parts[0]
-        parsed["client"] = parts[1]
-        parsed["lob"] = parts[2]
-        parsed["lang"] = parts[3]
-        parsed["campaign"] = parts[4]
-        parsed["message"] = parts[5]
-        parsed["size"] = parts[6]
-        parsed["date_part"] = "_".join(parts[7:])
-    else:
-        for i, key in enumerate(EXPECTED_COMPONENTS[:len(parts)]):
-            parsed[key] = parts[i]
-
-    return parsed
-
-
 def ensure_required_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     for col in REQUIRED_COLUMNS:
@@ -108,28 +58,11 @@ def rebuild_filename(row: dict):
 
 
 def load_zip_to_records(zip_bytes: bytes):
-    records = []
-
+    # Parsed as one column of names; see renamer_core.parse_bulk_filenames
     with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
-        for info in zf.infolist():
-            if info.is_dir():
-                continue
+        paths = [info.filename for info in zf.infolist() if not info.is_dir()]
 
-            rel_path = info.filename
-            filename = PurePosixPath(rel_path).name
-            folder = str(PurePosixPath(rel_path).parent)
-            parsed = parse_filename(filename)
-
-            records.append(
-                {
-                    "original_path": rel_path,
-                    "folder": "" if folder == "." else folder,
-                    "original_filename": filename,
-                    **parsed,
-                }
-            )
-
-    df = pd.DataFrame(records)
+    df = parse_bulk_filenames(paths) if paths else pd.DataFrame()
     return ensure_required_columns(df)
 
 
@@ -1,12 +1,45 @@
 import streamlit as st
 import pandas as pd
-import zipfile
 import io
 import os
-import re
-import base64
-import mimetypes
+import zipfile
 import streamlit.components.v1 as components
+from functools import partial
+
+from filematcher_core import (
+    HTML_PREVIEW_HEIGHT,
+    DEFAULT_LOAD_BUDGET,
+    DEFAULT_WEIGHT_CAPS_KB,
+    HTML_PREVIEW_WIDTH,
+    HashEntry,
+    MATCH_STATUSES,
+    NameNormalizer,
+    PreviewCache,
+    build_thumbnails,
+    SHEET_EXTS,
+    ZIP_MAX_DEPTH,
+    build_zip_preview,
+    check_load_budget,
+    content_digest,
+    delivery_validation_jobs,
+    duplicate_clusters,
+    expected_names_from_sheet,
+    guess_mime,
+    list_delivery_members,
+    match_report,
+    ZipLimitError,
+    open_delivery_member,
+    read_delivery_member,
+    read_zip_member,
+    report_to_csv,
+    report_to_xlsx,
+    sheet_columns,
+    static_media_url,
+    static_preview_url,
+    suggest_pairings,
+    validate_creatives,
+    validation_job,
+)
 
 # DO NOT use st.set_page_config here as it's already in Main_App.py
 
@@ -17,7 +50,12 @@ def reset_app():
     st.session_state["file_uploader_key"] += 1
     st.session_state["data_editor_key"] += 1
     st.session_state["preview_index"] = 0
-    st.session_state["zip_inner_index"] = 0
+    for key in list(st.session_state.keys()):
+        if key.startswith("zip_inner_index"):
+            st.session_state[key] = 0
+    st.session_state.pop("content_hash_cache", None)
+    st.session_state.pop("content_digests", None)
+    st.session_state.pop("report_export", None)
 
 if "file_uploader_key" not in st.session_state:
     st.session_state["file_uploader_key"] = 0
@@ -36,9 +74,17 @@ VIDEO_EXTS = {".mp4", ".mov", ".webm", ".m4v"}
 ZIP_EXTS = {".zip"}
 
 PREVIEW_IMAGE_WIDTH = 320
+CONTACT_SHEET_TILE_WIDTH = 160
 PREVIEW_VIDEO_WIDTH_PX = 320
-HTML_PREVIEW_WIDTH = 360
-HTML_PREVIEW_HEIGHT = 640
+
+EXPECTED_SOURCE_PASTE = "Paste into table"
+EXPECTED_SOURCE_SHEET = "Upload CSV/XLSX sheet"
+
+MATCH_SOURCE_FILES = "Uploaded files"
+MATCH_SOURCE_DELIVERY = "Contents of delivery zip(s)"
+
+PREVIEW_MODE_INLINE = "Inline (embedded)"
+PREVIEW_MODE_STATIC = "Static route (local server)"
 
 def get_extension(filename: str) -> str:
     return os.path.splitext(filename.lower())[1]
@@ -46,225 +92,278 @@ def get_extension(filename: str) -> str:
 def safe_file_list(uploaded_files):
     return uploaded_files if uploaded_files else []
 
-def guess_mime(path: str) -> str:
-    mime, _ = mimetypes.guess_type(path)
-    return mime or "application/octet-stream"
+@st.cache_resource(show_spinner=False)
+def get_preview_cache():
+    # Shared by all sessions; entries are keyed by content hash + preview settings
+    return PreviewCache()
 
-def to_data_url(file_bytes: bytes, mime: str) -> str:
-    b64 = base64.b64encode(file_bytes).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
+# Sheets are keyed by content hash; `_data` is excluded from Streamlit's argument hashing
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_sheet_columns(digest: str, file_name: str, _data):
+    return sheet_columns(io.BytesIO(_data), file_name)
 
-def normalize_zip_path(path: str) -> str:
-    return path.replace("\\", "/").lstrip("./")
+@st.cache_data(show_spinner="Reading expected names...", max_entries=16)
+def cached_sheet_names(digest: str, file_name: str, columns: tuple, has_header: bool, _data):
+    return expected_names_from_sheet(io.BytesIO(_data), file_name, columns, has_header)
 
-def join_zip_path(base_file: str, rel_path: str) -> str:
-    base_dir = os.path.dirname(base_file).replace("\\", "/")
-    joined = os.path.normpath(os.path.join(base_dir, rel_path)).replace("\\", "/")
-    return normalize_zip_path(joined)
+def render_name_table(names, label: str = "File"):
+    """One virtualized table instead of an element per name."""
+    st.dataframe(pd.DataFrame({label: list(names)}), hide_index=True, use_container_width=True)
 
-def render_small_video(file_bytes: bytes, mime_type: str = "video/mp4"):
-    try:
-        video_b64 = base64.b64encode(file_bytes).decode()
-        video_html = f"""
-        <div style="display:flex; justify-content:center; margin:10px 0;">
-            <video width="{PREVIEW_VIDEO_WIDTH_PX}" controls>
-                <source src="data:{mime_type};base64,{video_b64}">
-                Your browser does not support the video tag.
-            </video>
-        </div>
-        """
-        components.html(video_html, height=260)
-    except Exception:
-        st.video(file_bytes)
-
-def find_html_entry(zip_names):
-    preferred = ["index.html", "index.htm"]
-    normalized = [normalize_zip_path(n) for n in zip_names]
-
-    for pref in preferred:
-        for name in normalized:
-            if name.lower().endswith("/" + pref) or name.lower() == pref:
-                return name
-
-    html_files = [n for n in normalized if n.lower().endswith((".html", ".htm"))]
-    return html_files[0] if html_files else None
-
-def inline_css_urls(css_text: str, current_css_path: str, zip_file: zipfile.ZipFile):
-    def repl(match):
-        raw_url = match.group(1).strip().strip('"').strip("'")
-        if raw_url.startswith(("data:", "http://", "https://", "#")):
-            return f"url('{raw_url}')"
-
-        asset_path = join_zip_path(current_css_path, raw_url)
-        try:
-            asset_bytes = zip_file.read(asset_path)
-            mime = guess_mime(asset_path)
-            return f"url('{to_data_url(asset_bytes, mime)}')"
-        except Exception:
-            return f"url('{raw_url}')"
+@st.cache_data(show_spinner="Finding fuzzy pairings...", max_entries=8)
+def fuzzy_pairings(missing: tuple, extra: tuple, rules: tuple, min_score: float, max_edits: int):
+    pairings = suggest_pairings(missing, extra, NameNormalizer(*rules), min_score, max_edits)
+    return pd.DataFrame(pairings, columns=["Missing (expected)", "Extra (uploaded)", "Score"])
 
-    return re.sub(r"url\((.*?)\)", repl, css_text, flags=re.IGNORECASE)
-
-def build_inline_html_from_zip(zip_bytes: bytes):
+def delivery_members_for(uploaded_files):
     """
-    Attempt to render HTML5 zip creative by:
-    - locating index.html / first html file
-    - inlining local CSS, JS, images, video, and common asset refs as data URLs
+    Members of every uploaded zip, listed from the central directory only.
+    Cached per upload so reruns don't even reopen the archives.
     """
-    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
-        zip_names = [normalize_zip_path(n) for n in zf.namelist() if not n.endswith("/")]
-        if not zip_names:
-            return None, "This zip file is empty."
-
-        entry_html = find_html_entry(zip_names)
-        if not entry_html:
-            return None, "No HTML entry file found in zip."
+    cache = st.session_state.get("delivery_listing_cache", {})
+    fresh = {}
+    members, errors = [], []
+    for archive, f in enumerate(uploaded_files):
+        if get_extension(f.name) not in ZIP_EXTS:
+            errors.append(f"`{f.name}` is not a zip and was ignored.")
+            continue
+        cache_key = (f.file_id, f.name, f.size)
+        if cache_key not in cache:
+            try:
+                cache[cache_key] = list_delivery_members(f)
+            except Exception as e:
+                errors.append(f"Could not read `{f.name}`: {e}")
+                continue
+        fresh[cache_key] = cache[cache_key]
+        members.extend(m._replace(archive=archive) for m in fresh[cache_key])
+    # Drop listings of zips that are no longer uploaded
+    st.session_state["delivery_listing_cache"] = fresh
+    return members, errors
+
+def run_deep_validation(match_source, uploaded_files, delivery_members, caps_kb: dict):
+    """
+    Header-only validation of every upload (or delivery member), cached in
+    the session until the uploads or caps change.
+    """
+    cache_key = (
+        match_source,
+        tuple((f.file_id, f.size) for f in uploaded_files),
+        tuple(sorted(caps_kb.items())),
+    )
+    cached = st.session_state.get("validation_cache")
+    if cached and cached[0] == cache_key:
+        return cached[1]
+
+    jobs = []
+    if match_source == MATCH_SOURCE_DELIVERY:
+        for archive, f in enumerate(uploaded_files):
+            members = [m for m in delivery_members if m.archive == archive]
+            if members:
+                jobs.extend(delivery_validation_jobs(f, members))
+    else:
+        for f in uploaded_files:
+            f.seek(0)
+            jobs.append(validation_job(f, f.name, f.size))
+
+    result = pd.DataFrame(validate_creatives(jobs, caps_kb))
+    st.session_state["validation_cache"] = (cache_key, result)
+    return result
+
+def find_duplicate_uploads(match_source, uploaded_files, delivery_members):
+    """
+    Clusters of identical content across uploads (or delivery members).
+    Digests live in the session keyed by upload file_id plus (name, size), so
+    reruns don't rehash and same-named files in different uploads never collide.
+    """
+    cache = st.session_state.setdefault("content_hash_cache", {})
+    archives = []
+    try:
+        if match_source == MATCH_SOURCE_DELIVERY:
+            entries = []
+            for archive, f in enumerate(uploaded_files):
+                members = [m for m in delivery_members if m.archive == archive]
+                if not members:
+                    continue
+                zf = zipfile.ZipFile(f, "r")
+                archives.append(zf)
+                entries.extend(
+                    HashEntry(m.path, m.size, (f.file_id, m.path, m.size), partial(open_delivery_member, zf, m.path))
+                    for m in members
+                )
+        else:
+            entries = [HashEntry(f.name, f.size, (f.file_id, f.name, f.size), f.getbuffer) for f in uploaded_files]
+        return duplicate_clusters(entries, cache)
+    finally:
+        for zf in archives:
+            zf.close()
 
+def render_small_video(file_data, mime_type: str = "video/mp4", ext: str = ".mp4", source_key=None):
+    """
+    Static route: spool the video to a content-addressed file and let the
+    browser stream it with range requests (server memory stays flat).
+    With a `source_key` (upload file_id, plus member path) the digest is kept
+    in the session, so reruns don't re-hash the bytes.
+    Inline: hand the bytes to st.video, which serves them from Streamlit's
+    media endpoint instead of embedding base64 in the page.
+    """
+    if st.session_state.get("preview_delivery_mode") == PREVIEW_MODE_STATIC:
         try:
-            html = zf.read(entry_html).decode("utf-8", errors="replace")
+            # Not cached itself: the file may have been evicted from the static root since
+            video_url = static_media_url(file_data, ext, source_digest(source_key, file_data))
+            video_html = f"""
+            <div style="display:flex; justify-content:center; margin:10px 0;">
+                <video width="{PREVIEW_VIDEO_WIDTH_PX}" controls preload="metadata">
+                    <source src="{video_url}" type="{mime_type}">
+                    Your browser does not support the video tag.
+                </video>
+            </div>
+            """
+            components.html(video_html, height=260)
+            return
         except Exception as e:
-            return None, f"Could not read HTML entry file: {e}"
+            st.caption(f"Streaming preview unavailable ({e}); embedding instead.")
 
-        # Inline CSS <link href="...">
-        def replace_css_link(match):
-            href = match.group(1)
-            if href.startswith(("http://", "https://", "data:")):
-                return match.group(0)
-
-            asset_path = join_zip_path(entry_html, href)
-            try:
-                css_bytes = zf.read(asset_path)
-                css_text = css_bytes.decode("utf-8", errors="replace")
-                css_text = inline_css_urls(css_text, asset_path, zf)
-                return f"<style>{css_text}</style>"
-            except Exception:
-                return match.group(0)
-
-        html = re.sub(
-            r'<link[^>]+href=["\']([^"\']+\.css[^"\']*)["\'][^>]*>',
-            replace_css_link,
-            html,
-            flags=re.IGNORECASE
-        )
-
-        # Inline JS <script src="..."></script>
-        def replace_script_src(match):
-            src = match.group(1)
-            if src.startswith(("http://", "https://", "data:")):
-                return match.group(0)
-
-            asset_path = join_zip_path(entry_html, src)
-            try:
-                js_bytes = zf.read(asset_path)
-                js_text = js_bytes.decode("utf-8", errors="replace")
-                return f"<script>{js_text}</script>"
-            except Exception:
-                return match.group(0)
-
-        html = re.sub(
-            r'<script[^>]+src=["\']([^"\']+)["\'][^>]*>\s*</script>',
-            replace_script_src,
-            html,
-            flags=re.IGNORECASE
-        )
+    st.video(bytes(file_data), format=mime_type)
 
-        # Inline src=""
-        def replace_src(match):
-            attr = match.group(1)
-            src = match.group(2)
-
-            if src.startswith(("http://", "https://", "data:", "blob:")):
-                return match.group(0)
-
-            asset_path = join_zip_path(entry_html, src)
-            try:
-                asset_bytes = zf.read(asset_path)
-                mime = guess_mime(asset_path)
-                data_url = to_data_url(asset_bytes, mime)
-                return f'{attr}="{data_url}"'
-            except Exception:
-                return match.group(0)
-
-        html = re.sub(
-            r'(src)=["\']([^"\']+)["\']',
-            replace_src,
-            html,
-            flags=re.IGNORECASE
-        )
-
-        # Inline poster=""
-        html = re.sub(
-            r'(poster)=["\']([^"\']+)["\']',
-            replace_src,
-            html,
-            flags=re.IGNORECASE
-        )
-
-        # Inline href="" for common local asset cases
-        def replace_href(match):
-            attr = match.group(1)
-            href = match.group(2)
-
-            if href.startswith(("http://", "https://", "data:", "#", "mailto:", "tel:")):
-                return match.group(0)
+def source_digest(source_key, data) -> str:
+    """
+    content_digest of an upload (keyed by file_id) or one of its members,
+    computed once per session instead of on every rerun.
+    """
+    if source_key is None:
+        return content_digest(data)
+    digests = st.session_state.setdefault("content_digests", {})
+    if source_key not in digests:
+        digests[source_key] = content_digest(data)
+    return digests[source_key]
+
+def render_image_preview(image_bytes, cache_key: str, source_key=None):
+    """
+    Show a cached downscaled rendition; full resolution only on request.
+    """
+    width = st.session_state.get("thumbnail_width", PREVIEW_IMAGE_WIDTH)
+    if st.checkbox("Show full resolution", key=f"full_res_{cache_key}"):
+        st.image(bytes(image_bytes), width=PREVIEW_IMAGE_WIDTH)
+        return
+
+    digest = source_digest(source_key, image_bytes)
+    thumb = build_thumbnails([(digest, image_bytes)], width, get_preview_cache())[digest]
+    if isinstance(thumb, Exception):
+        st.caption(f"Thumbnail unavailable ({thumb}); showing original.")
+        thumb = bytes(image_bytes)
+    st.image(thumb, width=width)
+
+def render_contact_sheet(files):
+    """
+    Thumbnail grid of every uploaded image, rendered in one parallel batch.
+    """
+    images = [f for f in files if get_extension(f.name) in IMAGE_EXTS]
+    if not images:
+        st.caption("No images among the uploads.")
+        return
+
+    # Rendered at the tile size it is shown at, whatever the previewer's thumbnail width
+    items = [(source_digest((f.file_id,), f.getbuffer()), f.getbuffer()) for f in images]
+    thumbs = build_thumbnails(items, CONTACT_SHEET_TILE_WIDTH, get_preview_cache())
+
+    shown, captions = [], []
+    for f, (digest, data) in zip(images, items):
+        thumb = thumbs[digest]
+        shown.append(bytes(data) if isinstance(thumb, Exception) else thumb)
+        captions.append(f.name)
+    st.image(shown, width=CONTACT_SHEET_TILE_WIDTH, caption=captions)
+
+def current_load_budget() -> dict:
+    return {
+        "initial_kb": st.session_state.get("load_budget_kb", DEFAULT_LOAD_BUDGET["initial_kb"]),
+        "requests": st.session_state.get("load_budget_requests", DEFAULT_LOAD_BUDGET["requests"]),
+    }
+
+def cached_zip_preview(zip_bytes, digest: str = None) -> dict:
+    """
+    Shared with the previewer, so a creative graded here renders instantly there.
+    The build does not depend on the preview mode, so neither does the key.
+    """
+    return get_preview_cache().get_or_build(
+        (digest or content_digest(zip_bytes), "zip", HTML_PREVIEW_WIDTH, HTML_PREVIEW_HEIGHT),
+        lambda: build_zip_preview(bytes(zip_bytes)),
+    )
 
-            # Only inline likely assets, not navigation anchors
-            if not re.search(r'\.(css|js|png|jpg|jpeg|gif|webp|svg|mp4|webm|woff|woff2|ttf|otf)$', href, re.I):
-                return match.group(0)
+def render_load_report(load: dict):
+    """
+    Initial-load weight of one HTML5 creative against the load budget.
+    """
+    budget = current_load_budget()
+    graded = check_load_budget(load, budget)
+    verdict = "✅ Within" if graded["passed"] else "❌ Over"
+    st.markdown(
+        f"{verdict} load budget: **{graded['initial_kb']} KB** initial load "
+        f"(budget {budget['initial_kb']} KB, {graded['uncompressed_kb']} KB uncompressed), "
+        f"**{graded['requests']}** file requests (budget {budget['requests']}), "
+        f"**{graded['external']}** external."
+    )
+    with st.expander("Load budget report"):
+        st.caption("Largest assets in the initial load (sizes as stored in the zip).")
+        st.dataframe(pd.DataFrame(load["assets"]), hide_index=True, use_container_width=True)
+        if load["external"]:
+            st.caption("External requests left to the browser:")
+            render_name_table(load["external"])
+        if load["missing"]:
+            st.warning(f"Referenced but not in the zip: {', '.join(load['missing'])}")
+        if load["unused_files"]:
+            st.caption(
+                f"{load['unused_files']} files ({load['unused_compressed_bytes'] / 1024:.1f} KB) "
+                "are in the zip but not loaded by the entry HTML."
+            )
 
-            asset_path = join_zip_path(entry_html, href)
-            try:
-                asset_bytes = zf.read(asset_path)
-                mime = guess_mime(asset_path)
-                data_url = to_data_url(asset_bytes, mime)
-                return f'{attr}="{data_url}"'
-            except Exception:
-                return match.group(0)
-
-        html = re.sub(
-            r'(href)=["\']([^"\']+)["\']',
-            replace_href,
-            html,
-            flags=re.IGNORECASE
+def load_budget_table(match_source, uploaded_files, delivery_members) -> pd.DataFrame:
+    """
+    One row per HTML5 zip creative, graded against the current load budget.
+    """
+    if match_source == MATCH_SOURCE_DELIVERY:
+        creatives = [
+            (
+                m.path,
+                partial(read_delivery_member, uploaded_files[m.archive], m.path),
+                (uploaded_files[m.archive].file_id, m.path),
+            )
+            for m in delivery_members
+            if get_extension(m.name) in ZIP_EXTS
+        ]
+    else:
+        creatives = [
+            (f.name, f.getbuffer, (f.file_id,)) for f in uploaded_files if get_extension(f.name) in ZIP_EXTS
+        ]
+
+    budget = current_load_budget()
+    rows = []
+    for name, read, source_key in creatives:
+        try:
+            data = read()
+            zip_preview = cached_zip_preview(data, source_digest(source_key, data))
+        except Exception as e:
+            rows.append({"Status": "Not checked", "Creative": name, "Notes": str(e)})
+            continue
+        load = zip_preview["stats"].get("load")
+        if load is None:
+            rows.append({"Status": "Not checked", "Creative": name, "Notes": zip_preview["error"] or ""})
+            continue
+        graded = check_load_budget(load, budget)
+        rows.append(
+            {
+                "Status": "Pass" if graded["passed"] else "Fail",
+                "Creative": name,
+                "Initial load (KB)": graded["initial_kb"],
+                "Uncompressed (KB)": graded["uncompressed_kb"],
+                "Requests": graded["requests"],
+                "External": graded["external"],
+                "Largest asset": graded["offenders"][0]["Asset"] if graded["offenders"] else "",
+                "Notes": "; ".join(graded["notes"]),
+            }
         )
+    return pd.DataFrame(rows)
 
-        # Add a wrapper style to keep preview compact
-        wrapped_html = f"""
-        <!doctype html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                html, body {{
-                    margin: 0;
-                    padding: 0;
-                    background: #ffffff;
-                    overflow: auto;
-                }}
-                body {{
-                    display: flex;
-                    justify-content: center;
-                    align-items: flex-start;
-                }}
-                .preview-shell {{
-                    width: {HTML_PREVIEW_WIDTH}px;
-                    min-height: {HTML_PREVIEW_HEIGHT}px;
-                    overflow: hidden;
-                    background: white;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="preview-shell">
-                {html}
-            </div>
-        </body>
-        </html>
-        """
-        return wrapped_html, None
-
-def preview_regular_file(file_name: str, file_bytes: bytes):
+def preview_regular_file(file_name: str, file_bytes: bytes, depth: int = 0, source_key=None):
     ext = get_extension(file_name)
 
     st.markdown(f"**Previewing:** `{file_name}`")
@@ -273,13 +372,13 @@ def preview_regular_file(file_name: str, file_bytes: bytes):
 
     with center:
         if ext in IMAGE_EXTS:
-            st.image(file_bytes, width=PREVIEW_IMAGE_WIDTH)
+            render_image_preview(file_bytes, file_name, source_key)
 
         elif ext in VIDEO_EXTS:
-            render_small_video(file_bytes, mime_type=guess_mime(file_name))
+            render_small_video(file_bytes, mime_type=guess_mime(file_name), ext=ext, source_key=source_key)
 
         elif ext in ZIP_EXTS:
-            preview_zip_file(file_name, file_bytes)
+            preview_zip_file(file_name, file_bytes, depth, source_key)
 
         else:
             st.info("Preview is not supported for this file type.")
@@ -292,89 +391,133 @@ def preview_regular_file(file_name: str, file_bytes: bytes):
                 key=f"download_{file_name}"
             )
 
-def preview_zip_file(file_name: str, file_bytes: bytes):
+def preview_zip_file(file_name: str, file_bytes: bytes, depth: int = 0, source_key=None):
     st.markdown(f"**ZIP archive:** `{file_name}`")
+    index_key = "zip_inner_index" if depth == 0 else f"zip_inner_index_{depth}"
+    st.session_state.setdefault(index_key, 0)
 
     try:
-        with zipfile.ZipFile(io.BytesIO(file_bytes), "r") as zf:
-            all_names = [normalize_zip_path(n) for n in zf.namelist() if not n.endswith("/")]
-
-            if not all_names:
-                st.warning("This zip file is empty.")
-                return
-
-            st.write(f"Files inside zip: **{len(all_names)}**")
-
-            # Try animated HTML5 render first
-            html_preview, html_error = build_inline_html_from_zip(file_bytes)
-
-            if html_preview:
-                st.success("Animated HTML5 preview detected.")
-                components.html(
-                    html_preview,
-                    height=HTML_PREVIEW_HEIGHT,
-                    scrolling=True
-                )
+        preview_cache = get_preview_cache()
+        digest = source_digest(source_key, file_bytes)
+        mode = st.session_state.get("preview_delivery_mode", PREVIEW_MODE_INLINE)
+        zip_preview = cached_zip_preview(file_bytes, digest)
+        all_names = zip_preview["names"]
+        # Includes the contents of nested zips, e.g. `deliv/A_300x250.zip/index.html`
+        tree_names = zip_preview.get("tree") or all_names
+
+        if not all_names:
+            st.warning("This zip file is empty.")
+            return
+
+        st.write(f"Files inside zip: **{len(tree_names)}**")
+        if zip_preview.get("limit_error"):
+            st.warning(f"🛡️ Stopped reading this archive: {zip_preview['limit_error']}")
+
+        # Static route: extract once, let the browser fetch assets by URL
+        if mode == PREVIEW_MODE_STATIC:
+            try:
+                # Not cached: the extraction may have been evicted from the static root since
+                static_url, static_error = static_preview_url(file_bytes, digest)
+            except Exception as e:
+                static_url, static_error = None, f"Could not serve zip from the static route: {e}"
+
+            if static_url:
+                st.success("Animated HTML5 preview detected (served from local static route).")
+                if zip_preview["stats"].get("load"):
+                    render_load_report(zip_preview["stats"]["load"])
+                components.iframe(static_url, height=HTML_PREVIEW_HEIGHT, scrolling=True)
+                st.caption(f"[Open preview in a new tab]({static_url})")
                 with st.expander("View zip contents"):
-                    for item in all_names:
-                        st.write(f"• `{item}`")
+                    render_name_table(tree_names)
                 return
+            st.caption(f"Static preview unavailable ({static_error}); falling back to inline preview.")
+
+        # Try animated HTML5 render first
+        html_preview = zip_preview["html"]
+        html_error = zip_preview["error"]
+        asset_stats = zip_preview["stats"]
+
+        if html_preview:
+            st.success("Animated HTML5 preview detected.")
+            if asset_stats.get("reuse_hits"):
+                st.caption(
+                    f"♻️ {asset_stats['reuse_hits']} repeated asset references reused "
+                    f"({asset_stats['unique_assets']} unique assets); "
+                    f"saved {asset_stats['bytes_saved'] / 1024:.1f} KB of decompression/encoding."
+                )
+            render_load_report(asset_stats["load"])
+            components.html(
+                html_preview,
+                height=HTML_PREVIEW_HEIGHT,
+                scrolling=True
+            )
+            with st.expander("View zip contents"):
+                render_name_table(tree_names)
+            return
+
+        # Fallback: preview inner media files and nested creatives (zip of HTML5 zips)
+        previewable = []
+        for name in tree_names:
+            ext = get_extension(name)
+            if ext in IMAGE_EXTS or ext in VIDEO_EXTS or (ext in ZIP_EXTS and depth < ZIP_MAX_DEPTH):
+                previewable.append(name)
+
+        if previewable:
+            st.info("No HTML animation entry found. Showing media and nested zips from inside zip.")
+
+            if st.session_state[index_key] >= len(previewable):
+                st.session_state[index_key] = 0
+
+            zc1, zc2, zc3 = st.columns([1, 3, 1])
+
+            with zc1:
+                if st.button("⬅️ Prev inside zip", key=f"zip_prev_{file_name}"):
+                    st.session_state[index_key] = (
+                        st.session_state[index_key] - 1
+                    ) % len(previewable)
+
+            with zc2:
+                selected_inner = st.selectbox(
+                    "Select file inside zip",
+                    options=list(range(len(previewable))),
+                    format_func=lambda i: previewable[i],
+                    index=st.session_state[index_key],
+                    key=f"zip_select_{file_name}"
+                )
+                st.session_state[index_key] = selected_inner
+
+            with zc3:
+                if st.button("Next inside zip ➡️", key=f"zip_next_{file_name}"):
+                    st.session_state[index_key] = (
+                        st.session_state[index_key] + 1
+                    ) % len(previewable)
+
+            inner_name = previewable[st.session_state[index_key]]
+            inner_bytes = preview_cache.get_or_build(
+                (digest, "member", inner_name),
+                lambda: read_zip_member(file_bytes, inner_name),
+            )
+            inner_ext = get_extension(inner_name)
 
-            # Fallback: preview inner media files
-            previewable = []
-            for name in all_names:
-                ext = get_extension(name)
-                if ext in IMAGE_EXTS or ext in VIDEO_EXTS:
-                    previewable.append(name)
-
-            if previewable:
-                st.info("No HTML animation entry found. Showing media preview from inside zip.")
-
-                if st.session_state["zip_inner_index"] >= len(previewable):
-                    st.session_state["zip_inner_index"] = 0
-
-                zc1, zc2, zc3 = st.columns([1, 3, 1])
-
-                with zc1:
-                    if st.button("⬅️ Prev inside zip", key=f"zip_prev_{file_name}"):
-                        st.session_state["zip_inner_index"] = (
-                            st.session_state["zip_inner_index"] - 1
-                        ) % len(previewable)
-
-                with zc2:
-                    selected_inner = st.selectbox(
-                        "Select file inside zip",
-                        options=list(range(len(previewable))),
-                        format_func=lambda i: previewable[i],
-                        index=st.session_state["zip_inner_index"],
-                        key=f"zip_select_{file_name}"
-                    )
-                    st.session_state["zip_inner_index"] = selected_inner
-
-                with zc3:
-                    if st.button("Next inside zip ➡️", key=f"zip_next_{file_name}"):
-                        st.session_state["zip_inner_index"] = (
-                            st.session_state["zip_inner_index"] + 1
-                        ) % len(previewable)
-
-                inner_name = previewable[st.session_state["zip_inner_index"]]
-                inner_bytes = zf.read(inner_name)
-                inner_ext = get_extension(inner_name)
-
-                st.markdown(f"**Inner preview:** `{inner_name}`")
+            st.markdown(f"**Inner preview:** `{inner_name}`")
 
+            if inner_ext in ZIP_EXTS:
+                # Not wrapped in columns: Streamlit allows only one level of column nesting
+                preview_zip_file(f"{file_name}/{inner_name}", inner_bytes, depth + 1, (digest, inner_name))
+            else:
                 left, center, right = st.columns([2, 3, 2])
                 with center:
                     if inner_ext in IMAGE_EXTS:
-                        st.image(inner_bytes, width=PREVIEW_IMAGE_WIDTH)
+                        render_image_preview(inner_bytes, f"{file_name}/{inner_name}", (digest, inner_name))
                     elif inner_ext in VIDEO_EXTS:
-                        render_small_video(inner_bytes, mime_type=guess_mime(inner_name))
-            else:
-                st.warning(html_error or "No previewable content found inside this zip.")
+                        render_small_video(
+                            inner_bytes, mime_type=guess_mime(inner_name), ext=inner_ext, source_key=(digest, inner_name)
+                        )
+        else:
+            st.warning(html_error or "No previewable content found inside this zip.")
 
-            with st.expander("View zip contents"):
-                for item in all_names:
-                    st.write(f"• `{item}`")
+        with st.expander("View zip contents"):
+            render_name_table(tree_names)
 
     except Exception as e:
         st.error(f"Could not open zip file: {e}")
@@ -410,39 +553,99 @@ with col1:
         key=f"uploader_{st.session_state['file_uploader_key']}"
     )
 
-    uploaded_files = safe_file_list(uploaded_files)
-    uploaded_names = set([f.name for f in uploaded_files]) if uploaded_files else set()
+    match_source = st.radio(
+        "Match against",
+        [MATCH_SOURCE_FILES, MATCH_SOURCE_DELIVERY],
+        key="match_source",
+        help="Delivery zip(s) are matched by the names in their directory; "
+             "nothing is extracted until you preview a file.",
+    )
 
-    if uploaded_names:
-        st.success(f"✅ {len(uploaded_names)} files uploaded.")
+    uploaded_files = safe_file_list(uploaded_files)
+    delivery_members = []
+
+    if match_source == MATCH_SOURCE_DELIVERY:
+        delivery_members, delivery_errors = delivery_members_for(uploaded_files)
+        for message in delivery_errors:
+            st.warning(message)
+        uploaded_names = set(m.name for m in delivery_members)
+        if delivery_members:
+            st.success(f"✅ {len(uploaded_names)} files found in {len(uploaded_files)} zip(s).")
+            if len(uploaded_names) < len(delivery_members):
+                st.caption(f"{len(delivery_members) - len(uploaded_names)} members share a filename with another member.")
+    else:
+        uploaded_names = set([f.name for f in uploaded_files]) if uploaded_files else set()
+
+        if uploaded_names:
+            st.success(f"✅ {len(uploaded_names)} files uploaded.")
 
 with col2:
-    st.subheader(f"2. Paste Expected Names ({num_cols} Columns)")
-    column_names = [f"Col {i+1}" for i in range(num_cols)]
-    init_df = pd.DataFrame([["" for _ in range(num_cols)]] * 10, columns=column_names)
-
-    pasted_df = st.data_editor(
-        init_df,
-        num_rows="dynamic",
-        use_container_width=True,
-        hide_index=True,
-        key=f"editor_{st.session_state['data_editor_key']}_{num_cols}"
+    expected_source = st.radio(
+        "Expected names from",
+        [EXPECTED_SOURCE_PASTE, EXPECTED_SOURCE_SHEET],
+        horizontal=True,
+        key="expected_source",
     )
 
+    if expected_source == EXPECTED_SOURCE_SHEET:
+        st.subheader("2. Upload Expected Names Sheet")
+        sheet_file = st.file_uploader(
+            "Trafficking sheet (CSV or XLSX)",
+            type=sorted(ext.lstrip(".") for ext in SHEET_EXTS),
+            key=f"sheet_{st.session_state['file_uploader_key']}"
+        )
+        expected_names = set()
+
+        if sheet_file:
+            try:
+                sheet_data = sheet_file.getbuffer()
+                sheet_digest = content_digest(sheet_data)
+                header_cells = cached_sheet_columns(sheet_digest, sheet_file.name, sheet_data)
+                has_header = st.checkbox("First row is a header", value=True)
+                labels = header_cells if has_header else [f"Column {i + 1}" for i in range(len(header_cells))]
+                default_cols = [
+                    i for i, label in enumerate(labels)
+                    if has_header and ("name" in label.lower() or "file" in label.lower())
+                ] or [0]
+                name_cols = st.multiselect(
+                    "Columns containing filenames",
+                    options=list(range(len(labels))),
+                    default=default_cols if labels else [],
+                    format_func=lambda i: labels[i],
+                )
+                expected_names = set(
+                    cached_sheet_names(sheet_digest, sheet_file.name, tuple(name_cols), has_header, sheet_data)
+                )
+                st.success(f"✅ {len(expected_names)} distinct expected names read.")
+            except Exception as e:
+                st.error(f"Could not read sheet: {e}")
+    else:
+        st.subheader(f"2. Paste Expected Names ({num_cols} Columns)")
+        column_names = [f"Col {i+1}" for i in range(num_cols)]
+        init_df = pd.DataFrame([["" for _ in range(num_cols)]] * 10, columns=column_names)
+
+        pasted_df = st.data_editor(
+            init_df,
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key=f"editor_{st.session_state['data_editor_key']}_{num_cols}"
+        )
+
+        raw_pasted_names = pasted_df.values.flatten()
+        expected_names = set([str(name).strip() for name in raw_pasted_names if str(name).strip()])
+
 st.divider()
 
 # -----------------------------
 # Process the comparison
 # -----------------------------
 has_uploaded = len(uploaded_names) > 0
-has_pasted = not pasted_df.replace('', pd.NA).dropna(how='all').empty
+has_pasted = len(expected_names) > 0
 
 if not has_uploaded and not has_pasted:
     st.info("Waiting for file uploads and pasted data...")
 else:
-    raw_pasted_names = pasted_df.values.flatten()
-    expected_names = set([str(name).strip() for name in raw_pasted_names if str(name).strip()])
-
     matched = expected_names.intersection(uploaded_names)
     missing = expected_names - uploaded_names
     extra = uploaded_names - expected_names
@@ -457,26 +660,156 @@ else:
 
     st.write("---")
 
-    if not missing and expected_names:
-        st.success("✨ All pasted filenames were found in the uploaded batch!")
+    if not missing and has_pasted:
+        st.success("✅ All listed files are present.")
         if not extra:
             st.balloons()
 
-    res_a, res_b = st.columns(2)
+    locations = None
+    if match_source == MATCH_SOURCE_DELIVERY:
+        # First occurrence wins when a filename appears in several folders
+        locations = {m.name: m.path for m in reversed(delivery_members)}
+    report_df = match_report(expected_names, uploaded_names, locations)
+
+    f1, f2 = st.columns([2, 3])
+    with f1:
+        status_filter = st.multiselect(
+            "Show",
+            list(MATCH_STATUSES),
+            default=["Missing", "Extra"],
+            key="report_status_filter",
+        )
+    with f2:
+        name_filter = st.text_input("Filter by name", placeholder="e.g. 300x250", key="report_name_filter")
+
+    report_view = report_df[report_df["Status"].isin(status_filter)]
+    if name_filter:
+        report_view = report_view[report_view["File name"].str.contains(name_filter, case=False, regex=False)]
+
+    st.caption(f"Showing {len(report_view)} of {len(report_df)} rows")
+    st.dataframe(report_view, hide_index=True, use_container_width=True)
+
+    # Exports are built on request only, then kept until the names or filters change
+    export_key = (
+        hash(frozenset(expected_names)),
+        hash(frozenset(uploaded_names)),
+        tuple(status_filter),
+        name_filter,
+    )
+    export = st.session_state.get("report_export")
+    x1, x2, _ = st.columns([1, 1, 3])
+    if not export or export[0] != export_key:
+        if x1.button("📄 Prepare export", use_container_width=True):
+            with st.spinner("Preparing export..."):
+                export = (export_key, report_to_csv(report_view), report_to_xlsx(report_view))
+            st.session_state["report_export"] = export
+    if export and export[0] == export_key:
+        x1.download_button(
+            "📥 Download CSV",
+            data=export[1],
+            file_name="match_report.csv",
+            mime="text/csv",
+            use_container_width=True,
+        )
+        x2.download_button(
+            "📥 Download XLSX",
+            data=export[2],
+            file_name="match_report.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True,
+        )
+
+    if missing and extra and st.checkbox("🔎 Suggest fuzzy pairings for missing ↔ extra files"):
+        fz1, fz2, fz3, fz4, fz5, fz6 = st.columns(6)
+        ignore_case = fz1.checkbox("Ignore case", value=True)
+        unify_separators = fz2.checkbox("Treat - _ . space alike", value=True)
+        strip_version = fz3.checkbox("Ignore _v2 suffix", value=True)
+        ignore_extension = fz4.checkbox("Ignore extension", value=False)
+        min_score = fz5.slider("Min similarity", 0.3, 1.0, 0.6, 0.05)
+        max_edits = fz6.number_input("Max typos", min_value=1, max_value=5, value=2)
+
+        pairing_df = fuzzy_pairings(
+            tuple(sorted(missing)),
+            tuple(sorted(extra)),
+            (ignore_case, unify_separators, strip_version, ignore_extension),
+            min_score,
+            int(max_edits),
+        )
+        if pairing_df.empty:
+            st.info("No likely pairings found with these settings.")
+        else:
+            st.caption(f"{len(pairing_df)} suggested pairings; 1.0 means identical after normalization.")
+            st.dataframe(pairing_df, hide_index=True, use_container_width=True)
 
-    with res_a:
-        if missing:
-            st.error(f"❌ Missing Files ({len(missing)})")
-            for m in sorted(missing):
-                st.write(f"• `{m}`")
-        elif has_pasted:
-            st.success("✅ All listed files are present.")
+# -----------------------------
+# Deep validation
+# -----------------------------
+if has_uploaded and st.checkbox("🧪 Validate files against their names (pixel size, duration, weight)"):
+    v1, v2, v3 = st.columns(3)
+    caps_kb = {
+        "image": v1.number_input("Image cap (KB)", min_value=0, value=DEFAULT_WEIGHT_CAPS_KB["image"], step=10),
+        "video": v2.number_input("Video cap (KB)", min_value=0, value=DEFAULT_WEIGHT_CAPS_KB["video"], step=512),
+        "zip": v3.number_input("HTML5 zip cap (KB)", min_value=0, value=DEFAULT_WEIGHT_CAPS_KB["zip"], step=10),
+    }
+    st.caption("Only headers are read. A cap of 0 disables that weight check.")
+
+    with st.spinner("Validating..."):
+        try:
+            validation_df, validation_error = run_deep_validation(match_source, uploaded_files, delivery_members, caps_kb), None
+        except Exception as e:
+            validation_df, validation_error = pd.DataFrame(), str(e)
+
+    if validation_error:
+        st.error(f"Could not validate files: {validation_error}")
+    elif validation_df.empty:
+        st.info("Nothing to validate.")
+    else:
+        counts = validation_df["Status"].value_counts()
+        vm1, vm2, vm3 = st.columns(3)
+        vm1.metric("Pass", int(counts.get("Pass", 0)))
+        vm2.metric("Fail", int(counts.get("Fail", 0)))
+        vm3.metric("Not checked", int(counts.get("Not checked", 0)))
+
+        only_failures = st.checkbox("Show failures only", value=bool(counts.get("Fail", 0)))
+        shown = validation_df[validation_df["Status"] == "Fail"] if only_failures else validation_df
+        st.dataframe(shown, hide_index=True, use_container_width=True)
+        st.download_button(
+            "📥 Download validation CSV",
+            data=report_to_csv(validation_df),
+            file_name="validation_report.csv",
+            mime="text/csv",
+        )
 
-    with res_b:
-        if extra:
-            st.warning(f"➕ Extra Files ({len(extra)})")
-            for e in sorted(extra):
-                st.write(f"• `{e}`")
+# -----------------------------
+# Duplicate content
+# -----------------------------
+if has_uploaded and st.checkbox("🧬 Find identical files delivered under different names"):
+    with st.spinner("Hashing files..."):
+        try:
+            clusters, limit_error = find_duplicate_uploads(match_source, uploaded_files, delivery_members), None
+        except ZipLimitError as e:
+            clusters, limit_error = [], str(e)
+
+    if limit_error:
+        st.warning(f"🛡️ Stopped hashing this delivery: {limit_error}")
+    elif not clusters:
+        st.success("✅ No duplicate content found.")
+    else:
+        wasted = sum(group[0].size * (len(group) - 1) for _, group in clusters)
+        st.warning(f"⚠️ {len(clusters)} groups of identical files ({wasted / 1024 / 1024:.1f} MB duplicated).")
+        duplicate_df = pd.DataFrame(
+            [
+                {
+                    "Group": n,
+                    "File name": entry.label,
+                    "Size (KB)": round(entry.size / 1024, 1),
+                    "SHA-256": digest[:12],
+                }
+                for n, (digest, group) in enumerate(clusters, start=1)
+                for entry in group
+            ]
+        )
+        st.dataframe(duplicate_df, hide_index=True, use_container_width=True)
 
 # -----------------------------
 # File Previewer (Bottom)
@@ -484,8 +817,10 @@ else:
 st.divider()
 st.subheader("4. File Previewer")
 
-if uploaded_files:
-    if st.session_state["preview_index"] >= len(uploaded_files):
+preview_entries = delivery_members if match_source == MATCH_SOURCE_DELIVERY else uploaded_files
+
+if preview_entries:
+    if st.session_state["preview_index"] >= len(preview_entries):
         st.session_state["preview_index"] = 0
 
     p1, p2, p3 = st.columns([1, 3, 1])
@@ -494,14 +829,16 @@ if uploaded_files:
         if st.button("⬅️ Previous File", use_container_width=True):
             st.session_state["preview_index"] = (
                 st.session_state["preview_index"] - 1
-            ) % len(uploaded_files)
+            ) % len(preview_entries)
 
     with p2:
         selected_index = st.selectbox(
-            "Choose uploaded file",
-            options=list(range(len(uploaded_files))),
+            "Choose file to preview",
+            options=list(range(len(preview_entries))),
             index=st.session_state["preview_index"],
-            format_func=lambda i: uploaded_files[i].name
+            format_func=lambda i: (
+                preview_entries[i].path if match_source == MATCH_SOURCE_DELIVERY else preview_entries[i].name
+            )
         )
         st.session_state["preview_index"] = selected_index
 
@@ -509,19 +846,102 @@ if uploaded_files:
         if st.button("Next File ➡️", use_container_width=True):
             st.session_state["preview_index"] = (
                 st.session_state["preview_index"] + 1
-            ) % len(uploaded_files)
+            ) % len(preview_entries)
+
+    st.radio(
+        "Preview delivery",
+        [PREVIEW_MODE_INLINE, PREVIEW_MODE_STATIC],
+        horizontal=True,
+        key="preview_delivery_mode",
+        help="Static route extracts HTML5 zips and spools videos once, then serves them from a "
+             "local file server with range requests instead of embedding them in the page. "
+             "The browser must be able to reach the server (local use, or FILEMATCHER_PREVIEW_BASE_URL).",
+    )
+
+    st.number_input(
+        "Thumbnail width (px)",
+        min_value=64,
+        max_value=1920,
+        value=PREVIEW_IMAGE_WIDTH,
+        step=32,
+        key="thumbnail_width",
+        help="Width previewed images are shown at. They are downscaled once per file content "
+             "and width, then reused across reruns.",
+    )
 
-    current_file = uploaded_files[st.session_state["preview_index"]]
-    current_bytes = current_file.getvalue()
+    b1, b2 = st.columns(2)
+    b1.number_input(
+        "HTML5 initial-load budget (KB)",
+        min_value=1,
+        value=DEFAULT_LOAD_BUDGET["initial_kb"],
+        step=10,
+        key="load_budget_kb",
+        help="Zip-compressed weight of everything the entry HTML loads before user interaction.",
+    )
+    b2.number_input(
+        "HTML5 initial file requests",
+        min_value=1,
+        value=DEFAULT_LOAD_BUDGET["requests"],
+        step=1,
+        key="load_budget_requests",
+        help="Local assets loaded by the entry HTML plus external URLs it references.",
+    )
 
-    st.caption(f"File {st.session_state['preview_index'] + 1} of {len(uploaded_files)}")
+    if st.checkbox("📦 Check every HTML5 zip against the load budget", key="show_load_budget_table"):
+        with st.spinner("Measuring HTML5 creatives..."):
+            load_df = load_budget_table(match_source, uploaded_files, delivery_members)
+        if load_df.empty:
+            st.caption("No zip creatives to measure.")
+        else:
+            st.dataframe(load_df, hide_index=True, use_container_width=True)
+            st.download_button(
+                "📥 Download load budget CSV",
+                data=report_to_csv(load_df),
+                file_name="load_budget_report.csv",
+                mime="text/csv",
+            )
 
-    info1, info2, info3 = st.columns(3)
-    info1.metric("Filename", current_file.name)
-    info2.metric("Type", current_file.type if current_file.type else "Unknown")
-    info3.metric("Size (KB)", round(len(current_bytes) / 1024, 2))
+    if match_source == MATCH_SOURCE_FILES and st.checkbox(
+        "🗂️ Show contact sheet of all uploaded images", key="show_contact_sheet"
+    ):
+        render_contact_sheet(uploaded_files)
 
-    preview_regular_file(current_file.name, current_bytes)
+    current_file = preview_entries[st.session_state["preview_index"]]
+    if match_source == MATCH_SOURCE_DELIVERY:
+        # Only the previewed member is ever decompressed, once until it is evicted
+        delivery_zip = uploaded_files[current_file.archive]
+        source_key = (delivery_zip.file_id, current_file.path)
+        try:
+            current_bytes = get_preview_cache().get_or_build(
+                (source_key, "delivery_member"),
+                lambda: read_delivery_member(delivery_zip, current_file.path),
+            )
+        except ZipLimitError as e:
+            current_bytes = None
+            st.warning(f"🛡️ Not previewing `{current_file.path}`: {e}")
+        current_type = guess_mime(current_file.name)
+    elif (
+        get_extension(current_file.name) in VIDEO_EXTS
+        and st.session_state.get("preview_delivery_mode") == PREVIEW_MODE_STATIC
+    ):
+        # Zero-copy view of the upload; it is spooled to disk, never duplicated in memory
+        source_key = (current_file.file_id,)
+        current_bytes = current_file.getbuffer()
+        current_type = current_file.type
+    else:
+        source_key = (current_file.file_id,)
+        current_bytes = current_file.getvalue()
+        current_type = current_file.type
+
+    st.caption(f"File {st.session_state['preview_index'] + 1} of {len(preview_entries)}")
+
+    if current_bytes is not None:
+        info1, info2, info3 = st.columns(3)
+        info1.metric("Filename", current_file.name)
+        info2.metric("Type", current_type if current_type else "Unknown")
+        info3.metric("Size (KB)", round(len(current_bytes) / 1024, 2))
+
+        preview_regular_file(current_file.name, current_bytes, source_key=source_key)
 
 else:
     st.info("Upload files to use the previewer.")
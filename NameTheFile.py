@@ -2,9 +2,10 @@ import streamlit as st
 import pandas as pd
 import zipfile
 import io
-import re
 from pathlib import PurePosixPath
 
+from renamer_core import VERSION_PATTERN, parse_named_filenames
+
 st.set_page_config(page_title="Bulk Creative Renamer", layout="wide")
 
 st.title("Bulk Creative Renamer")
@@ -13,17 +14,6 @@ st.caption("Upload a ZIP, bulk rename filename components, and download a rename
 # =========================================================
 # Helpers
 # =========================================================
-EXPECTED_COMPONENTS = [
-    "year",
-    "client",
-    "lob",
-    "lang",
-    "campaign",
-    "message",
-    "size",
-    "date_version",
-]
-
 DISPLAY_COMPONENTS = {
     "year": "Year",
     "client": "Client",
@@ -35,51 +25,6 @@ DISPLAY_COMPONENTS = {
     "date_version": "Date / Version",
 }
 
-VERSION_PATTERN = re.compile(r"^(?P<base>.+?)(?:_(?P<version>v\d+))?$", re.IGNORECASE)
-
-
-def split_stem_and_ext(filename: str):
-    p = PurePosixPath(filename)
-    return p.stem, p.suffix
-
-
-def parse_filename(filename: str):
-    """
-    Expected filename structure:
-    2026_RCI_RWI_EN_Q1 Samsung NPI Launch_Double Your Storage COV QC_320x50_Mar.10.2026.png
-
-    Parsed as:
-    year_client_lob_lang_campaign_message_size_dateversion.ext
-    """
-    stem, ext = split_stem_and_ext(filename)
-    parts = stem.split("_")
-
-    parsed = {k: "" for k in EXPECTED_COMPONENTS}
-    parsed["ext"] = ext
-
-    if len(parts) >= 8:
-        parsed["year"] = parts[0]
-        parsed["client"] = parts[1]
-        parsed["lob"] = parts[2]
-        parsed["lang"] = parts[3]
-        parsed["campaign"] = parts[4]
-        parsed["message"] = parts[5]
-        parsed["size"] = parts[6]
-        parsed["date_version"] = "_".join(parts[7:])
-    else:
-        for i, key in enumerate(EXPECTED_COMPONENTS[:len(parts)]):
-            parsed[key] = parts[i]
-
-    m = VERSION_PATTERN.match(parsed["date_version"])
-    if m:
-        parsed["date"] = m.group("base") or ""
-        parsed["version"] = m.group("version") or ""
-    else:
-        parsed["date"] = parsed["date_version"]
-        parsed["version"] = ""
-
-    return parsed
-
 
 def rebuild_filename(row: dict):
     date_version = str(row.get("date", "")).strip()
@@ -106,29 +51,11 @@ def rebuild_filename(row: dict):
 
 
 def load_zip_to_records(zip_bytes: bytes):
-    records = []
-
+    # Parsed as one column of names; see renamer_core.parse_named_filenames
     with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
-        for info in zf.infolist():
-            if info.is_dir():
-                continue
-
-            rel_path = info.filename
-            filename = PurePosixPath(rel_path).name
-            folder = str(PurePosixPath(rel_path).parent)
-            parsed = parse_filename(filename)
-
-            records.append(
-                {
-                    "selected": True,
-                    "original_path": rel_path,
-                    "folder": "" if folder == "." else folder,
-                    "original_filename": filename,
-                    **parsed,
-                }
-            )
+        paths = [info.filename for info in zf.infolist() if not info.is_dir()]
 
-    return pd.DataFrame(records)
+    return parse_named_filenames(paths) if paths else pd.DataFrame()
 
 
 def apply_filters(df, folders, exts, langs, sizes, campaigns):
@@ -0,0 +1,85 @@
+"""
+Scale benchmark for AdMatcher against the offline FakeDropbox backend.
+
+Measures, per listing size:
+  - cold index: full recursive listing + snapshot write
+  - warm index: reload the snapshot from disk, then a cursor refresh after a small change
+  - code index build and matching a batch of ad codes
+  - temporary-link resolution (serial vs. the TemporaryLinkCache pool, then a cached rerun)
+
+Run from the repo root:
+    python benchmarks/bench_admatcher_scale.py [--sizes 10000 100000 1000000] [--latency 0.05]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admatcher_core import AdCodeIndex, DropboxIndex, TemporaryLinkCache  # noqa: E402
+from fake_dropbox import FakeDropbox, fake_ad_code  # noqa: E402
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def run_size(n_files: int, args, tmp_dir: str):
+    dbx = FakeDropbox(n_files=n_files, latency=0.0)
+    snapshot = os.path.join(tmp_dir, f"index_{n_files}.json")
+
+    index = DropboxIndex(snapshot)
+    cold_s, _ = timed(lambda: index.refresh(dbx))
+
+    dbx.add_files(args.changes)
+    dbx.delete_files(range(0, args.changes))
+    dbx.touch_files(range(args.changes, 2 * args.changes))
+
+    load_s, index = timed(lambda: DropboxIndex(snapshot))
+    delta_s, _ = timed(lambda: index.refresh(dbx))
+
+    codes = [fake_ad_code((i * 37) % n_files) for i in range(args.ads)]
+    build_s, code_index = timed(lambda: AdCodeIndex(index.files.values()))
+    match_s, matches = timed(lambda: [code_index.find(c) for c in codes])
+    found = [m for m in matches if m][: args.links]
+
+    link_dbx = FakeDropbox(n_files=0, latency=args.latency)
+    serial_sample = found[: max(1, args.links // 10)]
+    serial_s, _ = timed(lambda: [link_dbx.files_get_temporary_link(f.path_lower) for f in serial_sample])
+    serial_s *= len(found) / max(len(serial_sample), 1)
+
+    cache = TemporaryLinkCache()
+    pooled_s, _ = timed(lambda: cache.resolve_many(link_dbx, found))
+    cached_s, _ = timed(lambda: cache.resolve_many(link_dbx, found))
+
+    print(
+        f"{n_files:>10,} | {cold_s:8.2f} | {load_s:8.2f} | {delta_s:8.2f} | {build_s:8.2f} | {match_s:8.3f} "
+        f"| {serial_s:8.2f} | {pooled_s:8.2f} | {cached_s:8.4f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--ads", type=int, default=10_000, help="ad codes matched per size")
+    parser.add_argument("--links", type=int, default=300, help="temporary links resolved per size")
+    parser.add_argument("--changes", type=int, default=100, help="adds, deletes and edits before the warm refresh")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per link API call")
+    args = parser.parse_args()
+
+    print(
+        f"{'files':>10} | {'cold s':>8} | {'load s':>8} | {'delta s':>8} | {'build s':>8} | {'match s':>8} "
+        f"| {'serial s':>8} | {'pool s':>8} | {'cached s':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_files in args.sizes:
+            run_size(n_files, args, tmp_dir)
+    print(f"(serial link time extrapolated from a sample; {args.links} links at {args.latency * 1000:.0f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: AdMatcher parent-brand classification, BrandClassifier vs. the
+old substring if-chain.
+
+Run from the repo root:
+    python benchmarks/bench_brand_classifier.py [--strings 200000]
+
+First checks a table of real brand strings, including the ones where
+keyword boundaries matter (digits, underscores and CamelCase separate words;
+a keyword inside a longer word does not count). Then both classifiers are
+timed on brand strings drawn from a small vocabulary, as in an insertion
+order where the same strings repeat across many ads.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admatcher_core import BrandClassifier, load_brand_rules  # noqa: E402
+
+EXPECTED = {
+    "Bell Mobility": "Bell",
+    "CTV": "Bell",
+    "CTV2": "Bell",
+    "CTVNews": "Bell",
+    "BellMTS": "Bell",
+    "Bell-Media": "Bell",
+    "TELUS": "Telus",
+    "TELUS_Business": "Telus",
+    "Koodo Mobile": "Telus",
+    "Public Mobile": "Telus",
+    "FIZZ": "Fizz",
+    "Vidéotron / Québecor": "Videotron",
+    "Freedom Mobile": "Freedom",
+    "Rogers": "Other",
+    # The old substring test called these Bell
+    "Campbell": "Other",
+    "Bellmts": "Other",
+    "": "Other",
+}
+
+
+def legacy_parent_brand(text: str) -> str:
+    text = (text or "").lower()
+    if any(x in text for x in ["bell", "bce", "ctv"]):
+        return "Bell"
+    if "telus" in text:
+        return "Telus"
+    if "fizz" in text:
+        return "Fizz"
+    if "videotron" in text or "quebecor" in text:
+        return "Videotron"
+    if "freedom" in text:
+        return "Freedom"
+    return "Other"
+
+
+def check(classifier):
+    wrong = {text: (classifier.classify(text), want) for text, want in EXPECTED.items() if classifier.classify(text) != want}
+    assert not wrong, f"got/expected: {wrong}"
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strings", type=int, default=200_000)
+    args = parser.parse_args()
+
+    check(BrandClassifier(load_brand_rules()))
+    print(f"brand check      : {len(EXPECTED)} strings classified as expected")
+
+    rng = random.Random(5)
+    vocabulary = [t for t in EXPECTED if t] + [f"Campaign {i} - {rng.choice(list(EXPECTED))}" for i in range(500)]
+    texts = [rng.choice(vocabulary) for _ in range(args.strings)]
+
+    classifier = BrandClassifier(load_brand_rules())
+    legacy_s = timed(lambda: [legacy_parent_brand(t) for t in texts])
+    classifier_s = timed(lambda: [classifier.classify(t) for t in texts])
+    print(f"legacy if-chain  : {legacy_s:6.3f} s")
+    print(f"BrandClassifier  : {classifier_s:6.3f} s ({classifier.classify.cache_info().currsize} distinct strings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: AdMatcher code lookup, inverted index vs. the old linear scan.
+
+Run from the repo root:
+    python benchmarks/bench_code_index.py [--ads 10000] [--files 500000]
+
+The linear scan is O(ads x files), so it is timed on a sample of ads and
+extrapolated to the full ad count.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admatcher_core import AdCodeIndex, IndexedFile  # noqa: E402
+
+
+def synthetic_files(n_files: int, seed: int = 7):
+    rng = random.Random(seed)
+    exts = [".mp4", ".mov", ".mp3", ".wav", ".png", ".jpg"]
+    files = []
+    for i in range(n_files):
+        code = f"{rng.randrange(10_000_000, 100_000_000)}"
+        roll = rng.random()
+        if roll < 0.02:
+            # Code glued to other digits: only reachable through the fallback path
+            name = f"{code}{rng.randrange(100, 999)}_master{rng.choice(exts)}"
+        elif roll < 0.10:
+            name = f"asset_{i}_final{rng.choice(exts)}"
+        else:
+            name = f"{code}_Campaign_{i % 97}_EN{rng.choice(exts)}"
+        path = f"/clients/c{i % 50}/{name}".lower()
+        files.append(IndexedFile(name, path, path, f"id:{i}", f"{i:x}", 1024))
+    return files
+
+
+def linear_find(files, code):
+    for f in files:
+        if code in f.name:
+            return f
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ads", type=int, default=10_000)
+    parser.add_argument("--files", type=int, default=500_000)
+    parser.add_argument("--linear-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    files = synthetic_files(args.files)
+    rng = random.Random(11)
+    # Mix of hits (codes taken from names) and misses
+    coded_names = [f.name for f in files if f.name[:8].isdigit()]
+    codes = []
+    for _ in range(args.ads):
+        if rng.random() < 0.8:
+            name = rng.choice(coded_names)
+            offset = rng.randrange(0, 3) if name[8].isdigit() else 0
+            codes.append(name[offset:offset + 8])
+        else:
+            codes.append(f"{rng.randrange(10_000_000, 100_000_000)}")
+
+    t0 = time.perf_counter()
+    index = AdCodeIndex(files)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = [index.find(c) for c in codes]
+    lookup_s = time.perf_counter() - t0
+
+    sample = codes[: args.linear_sample]
+    t0 = time.perf_counter()
+    linear = [linear_find(files, c) for c in sample]
+    linear_s = (time.perf_counter() - t0) * (len(codes) / max(len(sample), 1))
+
+    mismatches = sum(1 for a, b in zip(indexed, linear) if a != b)
+
+    print(f"files={len(files):,} ads={len(codes):,} fallback_windows={len(index.fallback):,}")
+    print(f"index build      : {build_s:8.3f} s")
+    print(f"indexed lookups  : {lookup_s:8.3f} s")
+    print(f"linear (extrap.) : {linear_s:8.1f} s")
+    print(f"sample mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
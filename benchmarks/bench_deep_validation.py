@@ -0,0 +1,156 @@
+"""
+Benchmark: FileMatcher deep validation of creatives against their names.
+
+Run from the repo root:
+    python benchmarks/bench_deep_validation.py [--assets 2000] [--videos 12 --video-mb 40] [--workers N]
+
+Builds a synthetic delivery of PNG/GIF/JPEG/WebP banners and MP4 spots
+(with `moov` after `mdat`, the non-faststart worst case), a tenth of them
+deliberately wrong, then times probe reading and validation separately.
+Verifies exactly the planted failures are flagged.
+
+Then the same assets plus `--videos` large MP4 spots are packed into a
+deflated delivery zip, where reaching a trailing `moov` means inflating the
+whole `mdat`, and the probes are read with one worker and with `--workers`
+threads (default VALIDATION_WORKERS, which follows the CPU count).
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filematcher_core import (  # noqa: E402
+    VALIDATION_WORKERS,
+    ValidationJob,
+    delivery_validation_jobs,
+    list_delivery_members,
+    read_validation_probe,
+    validate_creatives,
+)
+
+SIZES = [(300, 250), (728, 90), (160, 600), (320, 50), (970, 250)]
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def fake_png(w, h, pad):
+    ihdr = struct.pack(">II", w, h) + b"\x08\x06\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\x00" * (4 + pad)
+
+
+def fake_gif(w, h, pad):
+    return b"GIF89a" + struct.pack("<HH", w, h) + b"\x00" * pad
+
+
+def fake_jpeg(w, h, pad):
+    app1 = b"\xff\xe1" + struct.pack(">H", 2 + 30_000) + b"\x00" * 30_000  # big EXIF before SOF
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, h, w, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app1 + sof + b"\x00" * pad
+
+
+def fake_webp(w, h, pad):
+    vp8x = b"VP8X" + struct.pack("<I", 10) + b"\x00" * 4 + (w - 1).to_bytes(3, "little") + (h - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", 4 + len(vp8x) + pad) + b"WEBP" + vp8x + b"\x00" * pad
+
+
+def fake_mp4(w, h, seconds, pad):
+    mvhd = struct.pack(">I", 0) + struct.pack(">III", 0, 0, 1000) + struct.pack(">I", int(seconds * 1000)) + b"\x00" * 80
+    tkhd = struct.pack(">I", 0) + b"\x00" * 72 + struct.pack(">II", w << 16, h << 16)
+    moov = box(b"moov", box(b"mvhd", mvhd) + box(b"trak", box(b"tkhd", tkhd)))
+    return box(b"ftyp", b"isom" + b"\x00" * 4) + box(b"mdat", b"\x00" * pad) + moov
+
+
+def synthetic_delivery(n: int, seed: int = 9):
+    rng = random.Random(seed)
+    assets, planted = [], set()
+    makers = [(".png", fake_png), (".gif", fake_gif), (".jpg", fake_jpeg), (".webp", fake_webp)]
+    for i in range(n):
+        w, h = rng.choice(SIZES)
+        bad = rng.random() < 0.1
+        if i % 5 == 0:
+            seconds = rng.choice([6, 15, 30])
+            actual = seconds + (3 if bad else 0.02)
+            name = f"2026_Bell_Spot{i}_EN_{seconds}s_1920x1080.mp4"
+            data = fake_mp4(1920, 1080, actual, rng.randrange(200_000, 600_000))
+        else:
+            ext, maker = rng.choice(makers)
+            name = f"2026_Bell_Banner{i}_EN_{w}x{h}{ext}"
+            data = maker(w + (10 if bad else 0), h, rng.randrange(20_000, 120_000))
+        if bad:
+            planted.add(name)
+        assets.append((name, data))
+    return assets, planted
+
+
+def media_payload(n_bytes: int, seed: int = 11) -> bytes:
+    """Roughly 2:1 compressible filler, so deflate has real work to undo (and ZipBudget's ratio check passes)."""
+    block = random.Random(seed).randbytes(1024 * 1024).translate(bytes(i & 0x0F for i in range(256)))
+    return (block * (n_bytes // len(block) + 1))[:n_bytes]
+
+
+def delivery_zip(assets, n_videos: int, video_mb: int) -> bytes:
+    mdat = media_payload(video_mb * 1024 * 1024)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for name, data in assets:
+            zf.writestr(f"deliv/{name}", data)
+        for i in range(n_videos):
+            moov = fake_mp4(1920, 1080, 15.02, 0)[16 + 8:]  # ftyp + empty mdat stripped
+            data = box(b"ftyp", b"isom" + b"\x00" * 4) + box(b"mdat", mdat) + moov
+            zf.writestr(f"deliv/video/2026_Bell_Hero{i}_EN_15s_1920x1080.mp4", data)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=2000)
+    parser.add_argument("--videos", type=int, default=12)
+    parser.add_argument("--video-mb", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=VALIDATION_WORKERS)
+    args = parser.parse_args()
+
+    assets, planted = synthetic_delivery(args.assets)
+
+    t0 = time.perf_counter()
+    jobs = [ValidationJob(name, len(data), read_validation_probe(io.BytesIO(data), name, len(data))) for name, data in assets]
+    probe_s = time.perf_counter() - t0
+    probe_mb = sum(len(j.probe) for j in jobs) / 1e6
+    total_mb = sum(len(d) for _, d in assets) / 1e6
+
+    t0 = time.perf_counter()
+    rows = validate_creatives(jobs)
+    validate_s = time.perf_counter() - t0
+
+    failed = {row["File name"] for row in rows if row["Status"] == "Fail"}
+    print(f"assets={len(assets):,} bytes={total_mb:.0f} MB probed={probe_mb:.1f} MB")
+    print(f"probe reads      : {probe_s:8.3f} s")
+    print(f"validate         : {validate_s:8.3f} s")
+    print(f"planted={len(planted)} flagged={len(failed)} exact={failed == planted}")
+
+    archive = delivery_zip(assets, args.videos, args.video_mb)
+    members = list_delivery_members(io.BytesIO(archive))
+    timings = {}
+    for workers in (1, args.workers):
+        t0 = time.perf_counter()
+        zip_jobs = delivery_validation_jobs(io.BytesIO(archive), members, workers=workers)
+        timings[workers] = time.perf_counter() - t0
+        zip_failed = {row["File name"] for row in validate_creatives(zip_jobs) if row["Status"] == "Fail"}
+        assert [j.name for j in zip_jobs] == [m.name for m in members], "jobs out of member order"
+        # The hero spots are over the 10 MB video weight cap by design
+        heroes = {m.name for m in members if "_Hero" in m.name}
+        assert zip_failed == planted | heroes, f"delivery zip with {workers} worker(s) flagged {len(zip_failed)}"
+    print(f"delivery zip     : {len(members):,} members, {args.videos} x {args.video_mb} MB MP4, {len(archive) / 1e6:.0f} MB deflated")
+    print(f"zip probes, 1 worker : {timings[1]:8.3f} s")
+    print(f"zip probes, {args.workers} workers: {timings[args.workers]:8.3f} s ({timings[1] / timings[args.workers]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: AdMatcher DOCX ingest (`iter_docx_paragraphs` + `iter_ad_records`).
+
+Run from the repo root:
+    python benchmarks/bench_docx_ingest.py [--ads 20000]
+
+Builds insertion orders with body paragraphs, a table of ads and a text box
+(written the way Word does, once in `mc:Choice` and once as the VML copy in
+`mc:Fallback`). Checks that every ad code comes out exactly once, then
+reports time and peak traced memory for a small and a large document, which
+should stay about the same.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admatcher_core import iter_ad_records, iter_docx_paragraphs  # noqa: E402
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+TEXT_BOX_CODE = "12345678"
+TEXT_BOX_BRAND = "Telus"
+
+
+def paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def text_box(lines) -> str:
+    """One text box anchored in a paragraph, with Word's DrawingML and VML copies."""
+    content = "".join(paragraph(line) for line in lines)
+    return (
+        "<w:p><w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx><w:txbxContent>{content}</w:txbxContent></wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>{content}</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p>"
+    )
+
+
+def ad_lines(code: int, i: int):
+    return [f"{code} - Spot {i}", f"Brand: Bell {i % 7}", f"Media Outlet: CTV {i % 5}"]
+
+
+def build_docx(n_ads: int):
+    """Return (docx_bytes, expected_codes); a third of the ads sit in one table."""
+    codes = [str(10_000_000 + i) for i in range(n_ads)]
+    body = [paragraph("INSERTION ORDER")]
+    rows = []
+    for i, code in enumerate(codes):
+        if i % 3 == 0:
+            cells = "".join(f"<w:tc>{paragraph(line)}</w:tc>" for line in ad_lines(code, i))
+            rows.append(f"<w:tr>{cells}</w:tr>")
+        else:
+            body.extend(paragraph(line) for line in ad_lines(code, i))
+    body.append(f"<w:tbl>{''.join(rows)}</w:tbl>")
+    body.append(text_box([f"{TEXT_BOX_CODE} Brand: {TEXT_BOX_BRAND}"]))
+    body.append("<w:sectPr/>")
+
+    xml = f'<?xml version="1.0" encoding="UTF-8"?><w:document {NAMESPACES}><w:body>{"".join(body)}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", xml)
+    return buffer.getvalue(), codes + [TEXT_BOX_CODE]
+
+
+def ingest(docx_bytes: bytes):
+    return list(iter_ad_records(iter_docx_paragraphs(io.BytesIO(docx_bytes))))
+
+
+def check(n_ads: int):
+    docx_bytes, expected = build_docx(n_ads)
+    records = ingest(docx_bytes)
+    codes = [r["code"] for r in records]
+    assert sorted(codes) == sorted(expected), "ad codes missing or duplicated (text box fallback read twice?)"
+    text_box_ads = [r for r in records if r["code"] == TEXT_BOX_CODE]
+    assert text_box_ads[0]["original_brand"] == TEXT_BOX_BRAND, text_box_ads
+
+
+def measure(n_ads: int):
+    docx_bytes, _ = build_docx(n_ads)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    # Stream without holding the records, as the peak should come from parsing alone
+    count = sum(1 for _ in iter_ad_records(iter_docx_paragraphs(io.BytesIO(docx_bytes))))
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, len(docx_bytes), elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ads", type=int, default=20_000)
+    args = parser.parse_args()
+
+    check(30)
+    check(args.ads)
+    print(f"ingest check     : every code once, text box read from mc:Choice only ({args.ads:,} ads)")
+
+    for n_ads in (max(1, args.ads // 10), args.ads):
+        count, size, elapsed, peak = measure(n_ads)
+        print(f"{count:>7,} ads ({size / 1e6:5.1f} MB docx): {elapsed:6.3f} s, peak traced {peak / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
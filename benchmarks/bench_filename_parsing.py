@@ -0,0 +1,120 @@
+"""
+Benchmark: renamer `load_zip_to_records` parsing, per-name loop vs. the
+vectorized pandas parsers in renamer_core.
+
+Run from the repo root:
+    python benchmarks/bench_filename_parsing.py [--names 100000] [--fuzz 20000]
+
+First a property check: `--fuzz` random member paths drawn from an alphabet
+heavy in the characters the parsers split on (`_ . / v` and digits, plus
+newlines and non-ASCII digits) must produce frames identical to the
+per-name reference, for both page layouts. Then both paths are timed on
+`--names` realistic creative paths.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import PurePosixPath
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from renamer_core import (  # noqa: E402
+    parse_bulk_filename,
+    parse_bulk_filenames,
+    parse_named_filename,
+    parse_named_filenames,
+)
+
+BRANDS = ["RCI", "Bell", "Telus", "Fizz"]
+SIZES = ["300x250", "728x90", "160x600", "320x50", "1080x1920"]
+EXTS = [".jpg", ".png", ".mp4", ".zip", ".gif", ""]
+FUZZ_ALPHABET = "ab_v1V2._/. \n٣é"
+EDGE_CASES = [".hidden", "x.", "..", "a//b.png", "/abs.png", "./x.png", "a/./b_v1.png", "a/../b.png", "_v", "_v1"]
+
+
+def legacy_records(paths, parse, extra=None):
+    """The previous load_zip_to_records body: one parse and one dict per member."""
+    records = []
+    for rel_path in paths:
+        filename = PurePosixPath(rel_path).name
+        folder = str(PurePosixPath(rel_path).parent)
+        records.append(
+            {
+                **(extra or {}),
+                "original_path": rel_path,
+                "folder": "" if folder == "." else folder,
+                "original_filename": filename,
+                **parse(filename),
+            }
+        )
+    return pd.DataFrame(records)
+
+
+def fuzz_paths(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    paths = set(EDGE_CASES)
+    while len(paths) < n:
+        path = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randrange(1, 30)))
+        if not path.endswith("/"):
+            paths.add(path)
+    return sorted(paths)
+
+
+def creative_paths(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n):
+        version = rng.choice(["", "", "_v2", "_V3"])
+        name = (
+            f"2026_{rng.choice(BRANDS)}_RWI_{rng.choice(['EN', 'FR'])}_Q1 Launch {i % 300}_"
+            f"Message {i % 40}_{rng.choice(SIZES)}_Mar.{rng.randrange(1, 29)}.2026{version}{rng.choice(EXTS)}"
+        )
+        if rng.random() < 0.1:
+            name = name.replace("_", " ", 2)  # short, malformed names
+        paths.append(f"deliv/{rng.choice(SIZES)}/{name}" if rng.random() < 0.8 else name)
+    return paths
+
+
+def check(paths):
+    pd.testing.assert_frame_equal(parse_bulk_filenames(paths), legacy_records(paths, parse_bulk_filename))
+    pd.testing.assert_frame_equal(
+        parse_named_filenames(paths), legacy_records(paths, parse_named_filename, {"selected": True})
+    )
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=100_000)
+    parser.add_argument("--fuzz", type=int, default=20_000)
+    args = parser.parse_args()
+
+    check(fuzz_paths(args.fuzz))
+    paths = creative_paths(args.names)
+    check(paths)
+    print(f"property check   : identical on {args.fuzz:,} fuzzed + {len(paths):,} creative paths")
+
+    for label, legacy, vectorized in [
+        ("BulkCreativeRenamer", lambda: legacy_records(paths, parse_bulk_filename), lambda: parse_bulk_filenames(paths)),
+        (
+            "NameTheFile",
+            lambda: legacy_records(paths, parse_named_filename, {"selected": True}),
+            lambda: parse_named_filenames(paths),
+        ),
+    ]:
+        legacy_s = timed(legacy)
+        vector_s = timed(vectorized)
+        print(f"{label:<20}: per-name {legacy_s:6.2f} s, vectorized {vector_s:6.2f} s ({legacy_s / vector_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
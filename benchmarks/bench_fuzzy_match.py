@@ -0,0 +1,86 @@
+"""
+Benchmark: FileMatcher fuzzy pairing of missing vs. extra names.
+
+Run from the repo root:
+    python benchmarks/bench_fuzzy_match.py [--names 50000]
+
+Builds `--names` expected names and an upload batch in which most files
+carry one realistic defect (typo, case change, `_v2` suffix, swapped
+separator). Reports pairing time and how many defects were paired back to
+their original. A brute-force difflib scan is timed on a sample and
+extrapolated for comparison.
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filematcher_core import NameNormalizer, suggest_pairings  # noqa: E402
+
+BRANDS = ["Bell", "Telus", "Fizz", "Videotron", "Freedom", "Koodo"]
+SIZES = ["300x250", "728x90", "160x600", "320x50", "1080x1920", "1920x1080"]
+EXTS = [".jpg", ".png", ".mp4", ".zip"]
+
+
+def synthetic_names(n: int, seed: int = 3):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        names.add(
+            f"2026_{rng.choice(BRANDS)}_Mob_{rng.choice(['EN', 'FR'])}_"
+            f"Campaign{rng.randrange(500)}_Msg{rng.randrange(20)}_{rng.choice(SIZES)}_"
+            f"{rng.randrange(1, 13):02d}{rng.randrange(1, 29):02d}{rng.choice(EXTS)}"
+        )
+    return sorted(names)
+
+
+def damage(name: str, rng: random.Random) -> str:
+    stem, ext = os.path.splitext(name)
+    roll = rng.random()
+    if roll < 0.25:
+        i = rng.randrange(5, len(stem) - 1)
+        return stem[:i] + stem[i + 1] + stem[i] + stem[i + 2:] + ext
+    if roll < 0.5:
+        return stem.upper() + ext
+    if roll < 0.75:
+        return f"{stem}_v{rng.randrange(2, 5)}{ext}"
+    return stem.replace("_", "-", 2) + ext
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--brute-sample", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    missing = synthetic_names(args.names)
+    originals = {}
+    for name in missing:
+        originals[damage(name, rng)] = name
+    extra = list(originals)
+
+    t0 = time.perf_counter()
+    pairings = suggest_pairings(missing, extra, NameNormalizer())
+    pair_s = time.perf_counter() - t0
+
+    correct = sum(1 for p in pairings if originals.get(p.extra) == p.missing)
+
+    sample = missing[: args.brute_sample]
+    t0 = time.perf_counter()
+    for name in sample:
+        max(extra, key=lambda other: difflib.SequenceMatcher(None, name, other).ratio())
+    brute_s = (time.perf_counter() - t0) * (len(missing) / max(len(sample), 1))
+
+    print(f"missing={len(missing):,} extra={len(extra):,}")
+    print(f"trigram pairing  : {pair_s:8.2f} s")
+    print(f"brute (extrap.)  : {brute_s:8.0f} s")
+    print(f"paired={len(pairings):,} correct={correct:,} ({correct / len(missing):.1%})")
+
+
+if __name__ == "__main__":
+    main()
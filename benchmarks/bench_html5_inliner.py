@@ -0,0 +1,163 @@
+"""
+Benchmark: FileMatcher HTML5 zip preview builder, single-pass tokenizer vs.
+the previous five full-document `re.sub` passes.
+
+Run from the repo root:
+    python benchmarks/bench_html5_inliner.py [--assets 240] [--asset-kb 24]
+"""
+import argparse
+import io
+import os
+import random
+import re
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filematcher_core import (  # noqa: E402
+    build_inline_html_from_zip,
+    find_html_entry,
+    guess_mime,
+    join_zip_path,
+    normalize_zip_path,
+    to_data_url,
+    wrap_preview_html,
+)
+
+
+def synthetic_banner_zip(n_assets: int, asset_kb: int, seed: int = 5) -> bytes:
+    """Banner with images, sprites reused across HTML and CSS, a few scripts and stylesheets."""
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    images = [f"img/frame_{i:03d}.png" for i in range(n_assets)]
+    scripts = [f"js/anim_{i}.js" for i in range(4)]
+    styles = [f"css/style_{i}.css" for i in range(4)]
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in images:
+            zf.writestr(path, rng.randbytes(asset_kb * 1024))
+        for path in scripts:
+            body = "\n".join(f"var s{i} = 'img/frame_{i:03d}.png'; // src=\"x.png\"" for i in range(200))
+            zf.writestr(path, body)
+        for i, path in enumerate(styles):
+            rules = "\n".join(
+                f".f{j} {{ background: url(../{images[(j * 7 + i) % n_assets]}); }}" for j in range(40)
+            )
+            zf.writestr(path, rules)
+
+        head = "\n".join(f'<link rel="stylesheet" href="{p}">' for p in styles)
+        head += "\n" + "\n".join(f'<script src="{p}"></script>' for p in scripts)
+        body = "\n".join(
+            f'<div class="f{i % 40}"><img src="{images[i]}" alt="frame {i}"></div>' for i in range(n_assets)
+        )
+        body += '\n<video poster="img/frame_000.png" src="img/frame_001.png"></video>'
+        body += "\n<script>var inline = '<img src=\"img/frame_002.png\">';</script>"
+        zf.writestr(
+            "index.html",
+            f"<!doctype html><html><head>{head}</head><body>{body}</body></html>",
+        )
+    return buffer.getvalue()
+
+
+def legacy_build(zip_bytes: bytes):
+    """The pre-tokenizer implementation (five re.sub passes), kept for comparison."""
+    def inline_css_urls(css_text, current_css_path, zip_file):
+        def repl(match):
+            raw_url = match.group(1).strip().strip('"').strip("'")
+            if raw_url.startswith(("data:", "http://", "https://", "#")):
+                return f"url('{raw_url}')"
+            asset_path = join_zip_path(current_css_path, raw_url)
+            try:
+                return f"url('{to_data_url(zip_file.read(asset_path), guess_mime(asset_path))}')"
+            except Exception:
+                return f"url('{raw_url}')"
+        return re.sub(r"url\((.*?)\)", repl, css_text, flags=re.IGNORECASE)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        zip_names = [normalize_zip_path(n) for n in zf.namelist() if not n.endswith("/")]
+        entry_html = find_html_entry(zip_names)
+        html = zf.read(entry_html).decode("utf-8", errors="replace")
+
+        def replace_css_link(match):
+            asset_path = join_zip_path(entry_html, match.group(1))
+            try:
+                css_text = zf.read(asset_path).decode("utf-8", errors="replace")
+                return f"<style>{inline_css_urls(css_text, asset_path, zf)}</style>"
+            except Exception:
+                return match.group(0)
+
+        html = re.sub(r'<link[^>]+href=["\']([^"\']+\.css[^"\']*)["\'][^>]*>', replace_css_link, html, flags=re.I)
+
+        def replace_script_src(match):
+            try:
+                return f"<script>{zf.read(join_zip_path(entry_html, match.group(1))).decode('utf-8', errors='replace')}</script>"
+            except Exception:
+                return match.group(0)
+
+        html = re.sub(r'<script[^>]+src=["\']([^"\']+)["\'][^>]*>\s*</script>', replace_script_src, html, flags=re.I)
+
+        def replace_src(match):
+            src = match.group(2)
+            if src.startswith(("http://", "https://", "data:", "blob:")):
+                return match.group(0)
+            asset_path = join_zip_path(entry_html, src)
+            try:
+                return f'{match.group(1)}="{to_data_url(zf.read(asset_path), guess_mime(asset_path))}"'
+            except Exception:
+                return match.group(0)
+
+        html = re.sub(r'(src)=["\']([^"\']+)["\']', replace_src, html, flags=re.I)
+        html = re.sub(r'(poster)=["\']([^"\']+)["\']', replace_src, html, flags=re.I)
+
+        def replace_href(match):
+            href = match.group(2)
+            if href.startswith(("http://", "https://", "data:", "#", "mailto:", "tel:")):
+                return match.group(0)
+            if not re.search(r'\.(css|js|png|jpg|jpeg|gif|webp|svg|mp4|webm|woff|woff2|ttf|otf)$', href, re.I):
+                return match.group(0)
+            asset_path = join_zip_path(entry_html, href)
+            try:
+                return f'{match.group(1)}="{to_data_url(zf.read(asset_path), guess_mime(asset_path))}"'
+            except Exception:
+                return match.group(0)
+
+        html = re.sub(r'(href)=["\']([^"\']+)["\']', replace_href, html, flags=re.I)
+        return wrap_preview_html(html), None
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=240)
+    parser.add_argument("--asset-kb", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    zip_bytes = synthetic_banner_zip(args.assets, args.asset_kb)
+    legacy_s, (legacy_html, _) = timed(lambda: legacy_build(zip_bytes), args.repeat)
+    single_s, (single_html, _) = timed(lambda: build_inline_html_from_zip(zip_bytes), args.repeat)
+    stats = {}
+    build_inline_html_from_zip(zip_bytes, stats=stats)
+
+    print(f"zip={len(zip_bytes) / 1e6:.1f} MB assets={args.assets} x {args.asset_kb} KB")
+    print(f"legacy 5-pass re.sub : {legacy_s:7.3f} s  output {len(legacy_html) / 1e6:6.1f} MB")
+    print(f"single-pass tokenizer: {single_s:7.3f} s  output {len(single_html) / 1e6:6.1f} MB")
+    print(
+        f"asset table: {stats['unique_assets']} unique, {stats['reuse_hits']} reuse hits, "
+        f"{stats['bytes_saved'] / 1e6:.1f} MB of decompression/encoding saved"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Offline stand-in for the parts of the Dropbox SDK that AdMatcher uses.
+
+Serves a synthetic, deterministic listing of any size with configurable
+page size and per-call latency, so indexing, matching and link resolution
+can be exercised and benchmarked without a Dropbox account.
+
+Select it in AdMatcher with `ADMATCHER_BACKEND=fake` (see AdMatcher.py).
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+FAKE_DEFAULT_FILES = 10_000
+FAKE_PAGE_SIZE = 2_000  # Dropbox returns at most ~2,000 entries per list_folder page
+FAKE_EXTS = [".mp4", ".mov", ".mp3", ".wav", ".png", ".jpg"]
+# 1x1 white GIF served for every thumbnail request
+FAKE_THUMBNAIL_B64 = "R0lGODlhAQABAIAAAP///wAAACH5BAEAAAAALAAAAAABAAEAAAICRAEAOw=="
+
+
+# Class names match the SDK so admatcher_core can tell entry kinds apart
+class FileMetadata(SimpleNamespace):
+    pass
+
+
+class FolderMetadata(SimpleNamespace):
+    pass
+
+
+class DeletedMetadata(SimpleNamespace):
+    pass
+
+
+class ResetError(Exception):
+    """Mimics the `reset` ApiError raised for an expired list_folder cursor."""
+
+    def __init__(self):
+        super().__init__("cursor reset")
+        self.error = SimpleNamespace(is_reset=lambda: True)
+
+
+def fake_ad_code(i: int) -> str:
+    return f"{10_000_000 + (i * 7919) % 90_000_000}"
+
+
+def fake_file(i: int, generation: int = 0) -> FileMetadata:
+    """Deterministic file #i; generated on demand so huge listings cost no memory up front."""
+    name = f"{fake_ad_code(i)}_Campaign_{i % 97}_EN{FAKE_EXTS[i % len(FAKE_EXTS)]}"
+    path = f"/clients/c{i % 50}/{name}"
+    return FileMetadata(
+        name=name,
+        path_lower=path.lower(),
+        path_display=path,
+        id=f"id:{i}",
+        rev=f"{i:x}g{generation}",
+        size=1_000_000 + i,
+    )
+
+
+class FakeDropbox:
+    """
+    Minimal `dropbox.Dropbox` replacement.
+
+    The base listing is files 0..n_files-1. `add_files`, `delete_files` and
+    `touch_files` append to a change log that `files_list_folder_continue`
+    serves as deltas, just like the real cursor API.
+    """
+
+    def __init__(self, n_files: int = FAKE_DEFAULT_FILES, page_size: int = FAKE_PAGE_SIZE, latency: float = 0.0):
+        self.n_files = n_files
+        self.page_size = page_size
+        self.latency = latency
+        self.changes = []
+        self.deleted = set()
+        self.generations = {}
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # -- mutations ----------------------------------------------------------
+    def add_files(self, count: int):
+        start = self.n_files
+        self.n_files += count
+        self.changes.extend(fake_file(i) for i in range(start, start + count))
+
+    def delete_files(self, indexes):
+        for i in indexes:
+            f = fake_file(i)
+            self.deleted.add(i)
+            self.changes.append(DeletedMetadata(name=f.name, path_lower=f.path_lower, path_display=f.path_display))
+
+    def touch_files(self, indexes):
+        for i in indexes:
+            self.generations[i] = self.generations.get(i, 0) + 1
+            self.changes.append(fake_file(i, self.generations[i]))
+
+    # -- SDK surface --------------------------------------------------------
+    def users_get_current_account(self):
+        self._call("users_get_current_account")
+        return SimpleNamespace(account_id="dbid:fake", name=SimpleNamespace(display_name="Fake Dropbox"))
+
+    def _listing_page(self, start: int):
+        end = min(start + self.page_size, self.n_files)
+        entries = [
+            fake_file(i, self.generations.get(i, 0))
+            for i in range(start, end)
+            if i not in self.deleted
+        ]
+        if end < self.n_files:
+            return SimpleNamespace(entries=entries, cursor=f"list:{end}", has_more=True)
+        # Listing finished: hand out a delta cursor positioned at the current change log
+        return SimpleNamespace(entries=entries, cursor=f"delta:{len(self.changes)}", has_more=False)
+
+    def files_list_folder(self, path: str, recursive: bool = False):
+        self._call("files_list_folder")
+        return self._listing_page(0)
+
+    def files_list_folder_continue(self, cursor: str):
+        self._call("files_list_folder_continue")
+        kind, _, pos = cursor.partition(":")
+        pos = int(pos)
+
+        if kind == "list":
+            return self._listing_page(pos)
+
+        if kind != "delta" or pos > len(self.changes):
+            raise ResetError()
+
+        end = min(pos + self.page_size, len(self.changes))
+        return SimpleNamespace(
+            entries=self.changes[pos:end],
+            cursor=f"delta:{end}",
+            has_more=end < len(self.changes),
+        )
+
+    def files_get_temporary_link(self, path: str):
+        self._call("files_get_temporary_link")
+        return SimpleNamespace(link=f"https://fake-dropbox.invalid/temp{path}", metadata=None)
+
+    def files_get_thumbnail_batch(self, entries):
+        self._call("files_get_thumbnail_batch")
+        success = SimpleNamespace(thumbnail=FAKE_THUMBNAIL_B64, metadata=None)
+        return SimpleNamespace(
+            entries=[
+                SimpleNamespace(is_success=lambda: True, get_success=lambda: success, get_failure=lambda: None)
+                for _ in entries
+            ]
+        )
@@ -0,0 +1,1755 @@
+"""
+Non-UI helpers for FileMatcher.py.
+
+Kept free of Streamlit so the preview builders can be reused and
+benchmarked from plain Python scripts.
+"""
+import base64
+import csv
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow ships with Streamlit; only thumbnails need it
+    Image = None
+
+HTML_PREVIEW_WIDTH = 360
+HTML_PREVIEW_HEIGHT = 640
+
+EXTERNAL_PREFIXES = ("http://", "https://", "//", "data:", "blob:", "#", "mailto:", "tel:", "javascript:")
+# href values that point at assets (not navigation) and are worth inlining
+ASSET_HREF_PATTERN = re.compile(r"\.(css|js|png|jpg|jpeg|gif|webp|svg|mp4|webm|woff|woff2|ttf|otf)$", re.IGNORECASE)
+
+
+def guess_mime(path: str) -> str:
+    mime, _ = mimetypes.guess_type(path)
+    return mime or "application/octet-stream"
+
+
+def to_data_url(file_bytes: bytes, mime: str) -> str:
+    b64 = base64.b64encode(file_bytes).decode("utf-8")
+    return f"data:{mime};base64,{b64}"
+
+
+def normalize_zip_path(path: str) -> str:
+    return path.replace("\\", "/").lstrip("./")
+
+
+def join_zip_path(base_file: str, rel_path: str) -> str:
+    # Query strings / fragments (cache busters like `?v=2`) are not part of the member name
+    rel_path = re.split(r"[?#]", rel_path, maxsplit=1)[0]
+    base_dir = os.path.dirname(base_file).replace("\\", "/")
+    joined = os.path.normpath(os.path.join(base_dir, rel_path)).replace("\\", "/")
+    return normalize_zip_path(joined)
+
+
+def find_html_entry(zip_names):
+    preferred = ["index.html", "index.htm"]
+    normalized = [normalize_zip_path(n) for n in zip_names]
+
+    for pref in preferred:
+        for name in normalized:
+            if name.lower().endswith("/" + pref) or name.lower() == pref:
+                return name
+
+    html_files = [n for n in normalized if n.lower().endswith((".html", ".htm"))]
+    return html_files[0] if html_files else None
+
+
+# -----------------------------
+# Zip safety limits
+# -----------------------------
+# Shared by every session on the server, so one archive must not be able to exhaust it
+ZIP_MAX_DEPTH = 3
+ZIP_MAX_MEMBERS = 20_000
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get("FILEMATCHER_ZIP_MAX_MB", "1024")) * 1024 * 1024
+ZIP_MAX_MEMBER_BYTES = 256 * 1024 * 1024  # largest single member ever held in memory
+ZIP_MAX_RATIO = 100
+ZIP_RATIO_MIN_BYTES = 1024 * 1024  # small text assets legitimately compress very well
+ZIP_SPOOL_MEMORY_BYTES = 16 * 1024 * 1024  # nested archives above this spill to disk
+
+
+class ZipLimitError(ValueError):
+    """An archive exceeded a safety limit (depth, member count, size or compression ratio)."""
+
+
+class ZipBudget:
+    """
+    Uncompressed-byte allowance for one traversal, shared across nesting levels.
+
+    Sizes are reserved from the central directory before a member is opened.
+    zipfile never inflates a member past its declared size, so a lying header
+    yields truncated data (and a CRC error), not an unbounded stream.
+    """
+
+    def __init__(
+        self,
+        max_total_bytes: int = ZIP_MAX_TOTAL_BYTES,
+        max_ratio: float = ZIP_MAX_RATIO,
+        max_depth: int = ZIP_MAX_DEPTH,
+        max_members: int = ZIP_MAX_MEMBERS,
+    ):
+        self.max_total_bytes = max_total_bytes
+        self.max_ratio = max_ratio
+        self.max_depth = max_depth
+        self.max_members = max_members
+        self.used_bytes = 0
+        self.members = 0
+
+    def enter(self, zf: zipfile.ZipFile, depth: int = 0):
+        if depth > self.max_depth:
+            raise ZipLimitError(f"Archives are nested more than {self.max_depth} levels deep.")
+        self.members += len(zf.infolist())
+        if self.members > self.max_members:
+            raise ZipLimitError(f"Archive has more than {self.max_members:,} entries.")
+
+    def reserve(self, info: zipfile.ZipInfo):
+        if info.file_size > ZIP_RATIO_MIN_BYTES and info.file_size > self.max_ratio * max(info.compress_size, 1):
+            ratio = info.file_size / max(info.compress_size, 1)
+            raise ZipLimitError(f"`{info.filename}` expands {ratio:,.0f}x (limit {self.max_ratio:,.0f}x).")
+        self.used_bytes += info.file_size
+        if self.used_bytes > self.max_total_bytes:
+            raise ZipLimitError(
+                f"Archive expands past {self.max_total_bytes // (1024 * 1024):,} MB uncompressed."
+            )
+
+    def open(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo):
+        self.reserve(info)
+        return zf.open(info)
+
+    def read(self, zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+        if info.file_size > ZIP_MAX_MEMBER_BYTES:
+            raise ZipLimitError(f"`{info.filename}` is too large to load ({info.file_size // (1024 * 1024):,} MB).")
+        with self.open(zf, info) as member:
+            return member.read()
+
+
+def is_zip_name(path: str) -> bool:
+    return path.lower().endswith(".zip")
+
+
+def walk_zip(fileobj, budget: ZipBudget = None, prefix: str = "", depth: int = 0):
+    """
+    Yield (path, ZipInfo) for every file in an archive, descending into
+    nested `.zip` members (paths like `outer.zip/inner/img.png` are relative
+    to the top archive). Nested archives are streamed into a spooled temp
+    file, so memory stays bounded whatever their size.
+    """
+    budget = budget or ZipBudget()
+    with zipfile.ZipFile(fileobj, "r") as zf:
+        budget.enter(zf, depth)
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            path = prefix + normalize_zip_path(info.filename)
+            yield path, info
+            if not is_zip_name(path):
+                continue
+            with budget.open(zf, info) as src, tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MEMORY_BYTES) as spool:
+                shutil.copyfileobj(src, spool, 64 * 1024)
+                spool.seek(0)
+                if zipfile.is_zipfile(spool):
+                    spool.seek(0)
+                    yield from walk_zip(spool, budget, path + "/", depth + 1)
+
+
+# -----------------------------
+# HTML5 zip inliner
+# -----------------------------
+# One token per comment or start tag; everything between tokens is copied as-is.
+HTML_TOKEN = re.compile(
+    r"<!--.*?-->"
+    r"|<(?P<tag>[a-zA-Z][\w:-]*)(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.DOTALL,
+)
+# src= / poster= / href= (including data-src, xlink:href) with a quoted value
+ASSET_ATTR = re.compile(r"(src|poster|href)(\s*=\s*)([\"'])(.*?)\3", re.IGNORECASE | re.DOTALL)
+SRC_ATTR = re.compile(r"(?<![\w:-])src\s*=\s*([\"'])(.*?)\1", re.IGNORECASE | re.DOTALL)
+CSS_URL = re.compile(r"url\((.*?)\)", re.IGNORECASE)
+RAW_TEXT_END = {
+    "script": re.compile(r"</script\s*>", re.IGNORECASE),
+    "style": re.compile(r"</style\s*>", re.IGNORECASE),
+}
+
+
+class ZipAssetTable:
+    """
+    Per-archive asset table for the inliner, keyed by normalized zip path.
+
+    Each member is decompressed and base64-encoded at most once however many
+    times the HTML, stylesheets and `url()` rules reference it. Lookups go
+    through the normalized name, so `./img/a.png` and `img/a.png` share an entry.
+    `stats()` reports how much decompression/encoding the reuse avoided.
+    """
+
+    def __init__(self, zip_file: zipfile.ZipFile, budget: ZipBudget = None):
+        self.zip_file = zip_file
+        self.budget = budget or ZipBudget()
+        self.members = {
+            normalize_zip_path(info.filename): info
+            for info in zip_file.infolist()
+            if not info.is_dir()
+        }
+        self._data_urls = {}
+        self._texts = {}
+        self.loaded = {}  # members the creative actually pulls in, in load order
+        self.missing = set()  # local references with no matching member
+        self.external = set()  # network URLs left for the browser to fetch
+        self.lookups = 0
+        self.reuse_hits = 0
+        self.members_read = 0
+        self.bytes_read = 0
+        self.bytes_encoded = 0
+        self.bytes_saved = 0
+
+    def _read(self, asset_path: str):
+        key = normalize_zip_path(asset_path)
+        info = self.members.get(key)
+        if info is None:
+            self.missing.add(key)
+            return None
+        data = self.budget.read(self.zip_file, info)
+        self.loaded[key] = info
+        self.members_read += 1
+        self.bytes_read += len(data)
+        return data
+
+    def data_url(self, asset_path: str):
+        key = normalize_zip_path(asset_path)
+        self.lookups += 1
+        if key in self._data_urls:
+            data_url = self._data_urls[key]
+            if data_url is not None:
+                self.reuse_hits += 1
+                self.bytes_saved += self.members[key].file_size + len(data_url)
+            return data_url
+
+        try:
+            data = self._read(key)
+            data_url = None if data is None else to_data_url(data, guess_mime(key))
+        except ZipLimitError:
+            raise
+        except Exception:
+            data_url = None
+        if data_url is not None:
+            self.bytes_encoded += len(data_url)
+        self._data_urls[key] = data_url
+        return data_url
+
+    def text(self, asset_path: str):
+        key = normalize_zip_path(asset_path)
+        self.lookups += 1
+        if key in self._texts:
+            text = self._texts[key]
+            if text is not None:
+                self.reuse_hits += 1
+                self.bytes_saved += self.members[key].file_size
+            return text
+
+        try:
+            data = self._read(key)
+            text = None if data is None else data.decode("utf-8", errors="replace")
+        except ZipLimitError:
+            raise
+        except Exception:
+            text = None
+        self._texts[key] = text
+        return text
+
+    def note_external(self, url: str):
+        if url.lower().startswith(("http://", "https://", "//")):
+            self.external.add(url)
+
+    def load_report(self) -> dict:
+        """Initial-load weight of the creative: what the entry HTML pulls in, plus what it leaves out."""
+        assets = sorted(
+            (
+                {
+                    "Asset": key,
+                    "Type": guess_mime(key),
+                    "Compressed (KB)": round(info.compress_size / 1024, 1),
+                    "Uncompressed (KB)": round(info.file_size / 1024, 1),
+                }
+                for key, info in self.loaded.items()
+            ),
+            key=lambda row: -row["Compressed (KB)"],
+        )
+        unused = [info for key, info in self.members.items() if key not in self.loaded]
+        return {
+            "assets": assets,
+            "initial_compressed_bytes": sum(info.compress_size for info in self.loaded.values()),
+            "initial_uncompressed_bytes": sum(info.file_size for info in self.loaded.values()),
+            "requests": len(self.loaded) + len(self.external),
+            "external": sorted(self.external),
+            "missing": sorted(self.missing),
+            "unused_files": len(unused),
+            "unused_compressed_bytes": sum(info.compress_size for info in unused),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "unique_assets": sum(1 for v in self._data_urls.values() if v is not None)
+            + sum(1 for v in self._texts.values() if v is not None),
+            "lookups": self.lookups,
+            "reuse_hits": self.reuse_hits,
+            "members_read": self.members_read,
+            "bytes_read": self.bytes_read,
+            "bytes_encoded": self.bytes_encoded,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def inline_css_urls(css_text: str, current_css_path: str, resolver: ZipAssetTable):
+    def repl(match):
+        raw_url = match.group(1).strip().strip('"').strip("'")
+        if raw_url.startswith(EXTERNAL_PREFIXES):
+            resolver.note_external(raw_url)
+            return f"url('{raw_url}')"
+
+        data_url = resolver.data_url(join_zip_path(current_css_path, raw_url))
+        return f"url('{data_url or raw_url}')"
+
+    return CSS_URL.sub(repl, css_text)
+
+
+def _rewrite_attrs(attrs: str, entry_html: str, resolver: ZipAssetTable) -> str:
+    def repl(match):
+        attr, eq, quote, value = match.groups()
+        value_stripped = value.strip()
+        # Only inline likely assets for href, not navigation anchors
+        if attr.lower() == "href" and not ASSET_HREF_PATTERN.search(value_stripped):
+            return match.group(0)
+
+        if not value_stripped or value_stripped.lower().startswith(EXTERNAL_PREFIXES):
+            resolver.note_external(value_stripped)
+            return match.group(0)
+
+        data_url = resolver.data_url(join_zip_path(entry_html, value_stripped))
+        if data_url is None:
+            return match.group(0)
+        return f"{attr}{eq}{quote}{data_url}{quote}"
+
+    return ASSET_ATTR.sub(repl, attrs)
+
+
+def _inline_stylesheet(attrs: str, entry_html: str, resolver: ZipAssetTable):
+    """`<link rel=stylesheet href=x.css>` -> `<style>...</style>`, or None to leave the tag alone."""
+    for match in ASSET_ATTR.finditer(attrs):
+        if match.group(1).lower() != "href":
+            continue
+        href = match.group(4).strip()
+        if ".css" not in href.lower() or href.lower().startswith(EXTERNAL_PREFIXES):
+            resolver.note_external(href)
+            return None
+        css_path = join_zip_path(entry_html, href)
+        css_text = resolver.text(css_path)
+        if css_text is None:
+            return None
+        return f"<style>{inline_css_urls(css_text, css_path, resolver)}</style>"
+    return None
+
+
+def rewrite_html_assets(html: str, entry_html: str, resolver: ZipAssetTable) -> str:
+    """
+    Inline every local asset reference of `html` in a single left-to-right scan.
+
+    - `<link href="*.css">` becomes `<style>` with its `url()`s inlined
+    - `<script src>` with an empty body becomes an inline `<script>`
+    - `src=`, `poster=` and asset `href=` attributes become data URLs
+    - `url()`s in inline `<style>` blocks are inlined; inline `<script>` bodies
+      and comments are copied through untouched
+    """
+    out = []
+    pos = 0
+    length = len(html)
+
+    while pos < length:
+        match = HTML_TOKEN.search(html, pos)
+        if not match:
+            break
+
+        out.append(html[pos:match.start()])
+        pos = match.end()
+        tag = (match.group("tag") or "").lower()
+        attrs = match.group("attrs") or ""
+
+        if not tag:
+            # Comment
+            out.append(match.group(0))
+            continue
+
+        if tag == "link":
+            inlined = _inline_stylesheet(attrs, entry_html, resolver)
+            out.append(inlined or f"<{match.group('tag')}{_rewrite_attrs(attrs, entry_html, resolver)}>")
+            continue
+
+        if tag in RAW_TEXT_END:
+            end_match = RAW_TEXT_END[tag].search(html, pos)
+            body_end = end_match.start() if end_match else length
+            after_end = end_match.end() if end_match else length
+            body = html[pos:body_end]
+            closing = end_match.group(0) if end_match else ""
+
+            if tag == "script":
+                src_match = SRC_ATTR.search(attrs)
+                src = src_match.group(2).strip() if src_match else ""
+                js_text = None
+                if src and not body.strip() and not src.lower().startswith(EXTERNAL_PREFIXES):
+                    js_text = resolver.text(join_zip_path(entry_html, src))
+                elif src:
+                    resolver.note_external(src)
+                if js_text is not None:
+                    kept_attrs = (attrs[:src_match.start()] + attrs[src_match.end():]).rstrip()
+                    out.append(f"<script{kept_attrs}>{js_text}</script>")
+                else:
+                    out.append(f"{match.group(0)}{body}{closing}")
+            else:
+                out.append(f"{match.group(0)}{inline_css_urls(body, entry_html, resolver)}{closing}")
+
+            pos = after_end
+            continue
+
+        out.append(f"<{match.group('tag')}{_rewrite_attrs(attrs, entry_html, resolver)}>")
+
+    out.append(html[pos:])
+    return "".join(out)
+
+
+def wrap_preview_html(html: str) -> str:
+    # Add a wrapper style to keep preview compact
+    return f"""
+        <!doctype html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <style>
+                html, body {{
+                    margin: 0;
+                    padding: 0;
+                    background: #ffffff;
+                    overflow: auto;
+                }}
+                body {{
+                    display: flex;
+                    justify-content: center;
+                    align-items: flex-start;
+                }}
+                .preview-shell {{
+                    width: {HTML_PREVIEW_WIDTH}px;
+                    min-height: {HTML_PREVIEW_HEIGHT}px;
+                    overflow: hidden;
+                    background: white;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="preview-shell">
+                {html}
+            </div>
+        </body>
+        </html>
+        """
+
+
+def _inline_html_from_zipfile(zf: zipfile.ZipFile, zip_names, stats: dict = None, budget: ZipBudget = None):
+    if not zip_names:
+        return None, "This zip file is empty."
+
+    entry_html = find_html_entry(zip_names)
+    if not entry_html:
+        return None, "No HTML entry file found in zip."
+
+    asset_table = ZipAssetTable(zf, budget)
+    html = asset_table.text(entry_html)
+    if html is None:
+        return None, f"Could not read HTML entry file: {entry_html}"
+
+    html = rewrite_html_assets(html, entry_html, asset_table)
+    if stats is not None:
+        stats.update(asset_table.stats())
+        stats["load"] = asset_table.load_report()
+    return wrap_preview_html(html), None
+
+
+def build_inline_html_from_zip(zip_bytes: bytes, stats: dict = None):
+    """
+    Attempt to render HTML5 zip creative by:
+    - locating index.html / first html file
+    - inlining local CSS, JS, images, video, and common asset refs as data URLs
+      in a single tokenizer pass (see `rewrite_html_assets`)
+
+    If a `stats` dict is passed it is filled with the asset table's reuse report
+    and, under `load`, its initial-load weight report.
+    Raises ZipLimitError when the archive breaks a ZipBudget limit.
+    """
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        budget = ZipBudget()
+        budget.enter(zf)
+        zip_names = [normalize_zip_path(n) for n in zf.namelist() if not n.endswith("/")]
+        return _inline_html_from_zipfile(zf, zip_names, stats, budget)
+
+
+def build_zip_preview(zip_bytes: bytes) -> dict:
+    """
+    Open the archive once and collect everything the zip previewer renders.
+
+    `names` are the top-level files (where the HTML entry is looked up);
+    `tree` also lists the contents of nested zips. A safety limit hit while
+    walking nested archives is reported in `limit_error` with a partial tree.
+    """
+    tree, limit_error = [], None
+    try:
+        for path, _ in walk_zip(io.BytesIO(zip_bytes)):
+            tree.append(path)
+    except ZipLimitError as e:
+        limit_error = str(e)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        names = [normalize_zip_path(n) for n in zf.namelist() if not n.endswith("/")]
+        stats = {}
+        try:
+            budget = ZipBudget()
+            budget.enter(zf)
+            html, error = _inline_html_from_zipfile(zf, names, stats, budget)
+        except ZipLimitError as e:
+            html, error = None, str(e)
+            limit_error = limit_error or str(e)
+    return {"names": names, "tree": tree, "html": html, "error": error, "stats": stats, "limit_error": limit_error}
+
+
+# IAB-style HTML5 load budget: zip-compressed initial load and initial file requests
+DEFAULT_LOAD_BUDGET = {"initial_kb": 150, "requests": 15}
+LOAD_OFFENDERS = 5
+
+
+def check_load_budget(load: dict, budget: dict = None) -> dict:
+    """
+    Grade a `ZipAssetTable.load_report()` against a load budget.
+
+    Initial load is measured as the zip-compressed size of everything the
+    entry HTML pulls in, the closest local stand-in for bytes on the wire.
+    """
+    budget = {**DEFAULT_LOAD_BUDGET, **(budget or {})}
+    initial_kb = load["initial_compressed_bytes"] / 1024
+    notes = []
+    if initial_kb > budget["initial_kb"]:
+        notes.append(f"initial load {initial_kb:.0f} KB > {budget['initial_kb']} KB")
+    if load["requests"] > budget["requests"]:
+        notes.append(f"{load['requests']} requests > {budget['requests']}")
+    return {
+        "passed": not notes,
+        "initial_kb": round(initial_kb, 1),
+        "uncompressed_kb": round(load["initial_uncompressed_bytes"] / 1024, 1),
+        "requests": load["requests"],
+        "external": len(load["external"]),
+        "offenders": load["assets"][:LOAD_OFFENDERS],
+        "notes": notes,
+    }
+
+
+def read_zip_member(zip_bytes: bytes, name: str, budget: ZipBudget = None, depth: int = 0) -> bytes:
+    """
+    Read one member by its normalized name (handles `./` prefixes and
+    backslashes). Names from `walk_zip` such as `inner.zip/img/a.png`
+    descend into nested archives.
+    """
+    return _read_zip_member(io.BytesIO(zip_bytes), name, budget or ZipBudget(), depth)
+
+
+def _read_zip_member(fileobj, name: str, budget: ZipBudget, depth: int) -> bytes:
+    with zipfile.ZipFile(fileobj, "r") as zf:
+        budget.enter(zf, depth)
+        nested = None
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            member = normalize_zip_path(info.filename)
+            if member == name:
+                return budget.read(zf, info)
+            if is_zip_name(member) and name.startswith(member + "/"):
+                nested = info, name[len(member) + 1:]
+        if nested is not None:
+            # Spooled like walk_zip: only the member finally returned is held in memory
+            info, inner_name = nested
+            with budget.open(zf, info) as src, tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MEMORY_BYTES) as spool:
+                shutil.copyfileobj(src, spool, 64 * 1024)
+                spool.seek(0)
+                return _read_zip_member(spool, inner_name, budget, depth + 1)
+    raise KeyError(f"There is no item named {name!r} in the archive")
+
+
+# -----------------------------
+# Preview cache
+# -----------------------------
+PREVIEW_CACHE_BUDGET_BYTES = int(os.environ.get("FILEMATCHER_PREVIEW_CACHE_MB", "256")) * 1024 * 1024
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def approx_preview_bytes(value) -> int:
+    """Rough size of a cached preview: strings and bytes dominate, containers are counted shallowly."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approx_preview_bytes(v) for v in value.values()) + 64 * len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(approx_preview_bytes(v) for v in value) + 8 * len(value)
+    return 64
+
+
+class PreviewCache:
+    """
+    Thread-safe LRU of built previews under a byte budget.
+
+    Keys start with the SHA-256 of the uploaded bytes followed by the preview
+    settings, so identical uploads share an entry across reruns and sessions.
+    Entries larger than the whole budget are built but never stored.
+    """
+
+    def __init__(self, budget_bytes: int = PREVIEW_CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes: int = None):
+        nbytes = approx_preview_bytes(value) if nbytes is None else nbytes
+        if nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes_used -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.bytes_used += nbytes
+            while self.bytes_used > self.budget_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.bytes_used -= evicted_bytes
+
+    def get_or_build(self, key, builder):
+        value = self.get(key)
+        if value is None:
+            value = builder()
+            self.put(key, value)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# -----------------------------
+# Image thumbnails
+# -----------------------------
+THUMBNAIL_WORKERS = min(8, os.cpu_count() or 4)
+THUMBNAIL_JPEG_QUALITY = 85
+
+_thumbnail_pool = None
+_thumbnail_pool_lock = threading.Lock()
+
+
+def make_thumbnail(data, width: int) -> bytes:
+    """
+    Downscale an image to `width` px wide (first frame for animations).
+
+    Opaque images become JPEG, images with transparency PNG. Images already
+    narrower than `width` (or any image when Pillow is missing) are returned
+    unchanged.
+    """
+    if Image is None:
+        return bytes(data)
+
+    with Image.open(io.BytesIO(data)) as im:
+        if im.width <= width:
+            return bytes(data)
+
+        height = max(1, round(im.height * width / im.width))
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        im.draft("RGB", (width, height))
+        has_alpha = im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info)
+        frame = im.convert("RGBA" if has_alpha else "RGB")
+        frame.thumbnail((width, height), reducing_gap=2.0)
+
+        out = io.BytesIO()
+        if has_alpha:
+            frame.save(out, "PNG")
+        else:
+            frame.save(out, "JPEG", quality=THUMBNAIL_JPEG_QUALITY, optimize=True)
+        return out.getvalue()
+
+
+def _get_thumbnail_pool() -> ThreadPoolExecutor:
+    global _thumbnail_pool
+    with _thumbnail_pool_lock:
+        if _thumbnail_pool is None:
+            _thumbnail_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+        return _thumbnail_pool
+
+
+def build_thumbnails(items, width: int, cache: PreviewCache) -> dict:
+    """
+    Thumbnails for many images at once: {digest: jpeg_or_png_bytes_or_exception}.
+
+    `items` is an iterable of (digest, image_bytes). Each content hash is
+    rendered once per width on a shared worker pool; results are cached.
+    """
+    results = {}
+    futures = {}
+    for digest, data in items:
+        if digest in results or digest in futures:
+            continue
+        cached = cache.get((digest, "thumb", width))
+        if cached is not None:
+            results[digest] = cached
+        else:
+            futures[digest] = _get_thumbnail_pool().submit(make_thumbnail, data, width)
+
+    for digest, future in futures.items():
+        try:
+            thumb = future.result()
+            cache.put((digest, "thumb", width), thumb)
+            results[digest] = thumb
+        except Exception as e:
+            results[digest] = e
+    return results
+
+
+# -----------------------------
+# Static preview route
+# -----------------------------
+# Streamlit's own /app/static route serves HTML/JS as text/plain, so extracted
+# creatives are served by a small local file server instead. The browser then
+# loads the entry HTML by URL and fetches assets lazily, with normal caching
+# and HTTP range requests.
+PREVIEW_STATIC_ROOT = os.path.join(".cache", "filematcher_static")
+PREVIEW_SERVER_HOST = os.environ.get("FILEMATCHER_PREVIEW_HOST", "127.0.0.1")
+PREVIEW_SERVER_PORT = int(os.environ.get("FILEMATCHER_PREVIEW_PORT", "0"))
+# Set when the server sits behind a proxy, e.g. https://previews.example.com
+PREVIEW_PUBLIC_BASE_URL = os.environ.get("FILEMATCHER_PREVIEW_BASE_URL", "")
+RANGE_CHUNK_BYTES = 64 * 1024
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+PREVIEW_STATIC_BUDGET_BYTES = int(os.environ.get("FILEMATCHER_STATIC_CACHE_MB", "2048")) * 1024 * 1024
+STATIC_MEDIA_DIR = "media"
+TMP_MARKER = ".tmp-"
+
+
+def disk_bytes(path: str) -> int:
+    """Size of a file, or of every file under a directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def remove_path(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class StaticRootCache:
+    """
+    Byte budget for the static root, evicted least recently used first.
+
+    Entries are extracted creatives (`<sha256>/`) and spooled media
+    (`media/<sha256><ext>`). The root is scanned once, before this process
+    writes anything to it: leftover `*.tmp-*` entries from a crashed run are
+    removed and the rest are ordered by mtime, which `touch` refreshes, so the
+    use order survives restarts. The entry just added is never evicted, even
+    when it alone exceeds the budget.
+    """
+
+    def __init__(self, root: str = PREVIEW_STATIC_ROOT, budget_bytes: int = PREVIEW_STATIC_BUDGET_BYTES):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.bytes_used = 0
+        self._entries = OrderedDict()  # rel_path -> bytes, oldest first
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(root, STATIC_MEDIA_DIR), exist_ok=True)
+        found = []
+        for folder in ("", STATIC_MEDIA_DIR):
+            for name in os.listdir(os.path.join(root, folder)):
+                rel_path = f"{folder}/{name}" if folder else name
+                path = os.path.join(root, rel_path)
+                if TMP_MARKER in name:
+                    remove_path(path)
+                elif rel_path != STATIC_MEDIA_DIR:
+                    found.append((os.path.getmtime(path), rel_path, disk_bytes(path)))
+        for _, rel_path, nbytes in sorted(found):
+            self._entries[rel_path] = nbytes
+            self.bytes_used += nbytes
+
+    def touch(self, rel_path: str) -> bool:
+        """Mark an entry as used; False if it is not (or no longer) on disk."""
+        with self._lock:
+            if rel_path not in self._entries:
+                return False
+            self._entries.move_to_end(rel_path)
+        try:
+            os.utime(os.path.join(self.root, rel_path))
+        except OSError:
+            pass
+        return True
+
+    def add(self, rel_path: str):
+        """Account for a new entry, then evict older ones until back under budget."""
+        nbytes = disk_bytes(os.path.join(self.root, rel_path))
+        with self._lock:
+            self.bytes_used += nbytes - self._entries.pop(rel_path, 0)
+            self._entries[rel_path] = nbytes
+            evicted = []
+            while self.bytes_used > self.budget_bytes and len(self._entries) > 1:
+                old_path, old_bytes = self._entries.popitem(last=False)
+                self.bytes_used -= old_bytes
+                evicted.append(old_path)
+        for old_path in evicted:
+            remove_path(os.path.join(self.root, old_path))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_static_cache = None
+_static_cache_lock = threading.Lock()
+
+
+def get_static_cache() -> StaticRootCache:
+    """Process-wide budget for PREVIEW_STATIC_ROOT, created before its first write."""
+    global _static_cache
+    with _static_cache_lock:
+        if _static_cache is None:
+            _static_cache = StaticRootCache()
+        return _static_cache
+
+
+def safe_member_path(name: str):
+    """Normalized relative path for a zip member, or None if it would escape the target dir."""
+    normalized = normalize_zip_path(name)
+    parts = normalized.split("/")
+    if not normalized or normalized.startswith("/") or ".." in parts or ":" in parts[0]:
+        return None
+    return normalized
+
+
+def extract_zip_to_cache(zip_bytes: bytes, digest: str = None):
+    """
+    Extract an archive once into `<static root>/<sha256>/` and return (digest, directory).
+
+    The directory name is the content hash, so re-uploads of the same bytes
+    reuse the existing extraction and served URLs never change meaning.
+    """
+    cache = get_static_cache()
+    digest = digest or hashlib.sha256(zip_bytes).hexdigest()
+    target = os.path.join(cache.root, digest)
+    if cache.touch(digest):
+        return digest, target
+
+    tmp_target = f"{target}{TMP_MARKER}{threading.get_ident()}"
+    budget = ZipBudget()
+    try:
+        with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+            budget.enter(zf)
+            for info in zf.infolist():
+                rel_path = safe_member_path(info.filename)
+                if info.is_dir() or rel_path is None:
+                    continue
+                dest = os.path.join(tmp_target, *rel_path.split("/"))
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                with budget.open(zf, info) as src, open(dest, "wb") as out:
+                    shutil.copyfileobj(src, out, RANGE_CHUNK_BYTES)
+    except Exception:
+        # Limit hits, bad archives, CRC and disk errors alike: never leave a partial tree
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp_target, target)
+    except OSError:
+        # Another session finished the same extraction first
+        shutil.rmtree(tmp_target, ignore_errors=True)
+    cache.add(digest)
+    return digest, target
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler with single-range `Range:` support and long-lived caching."""
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        # Every served path lives under a content hash, so it can never go stale
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+    def list_directory(self, path):
+        # The root holds every session's creatives and videos; only exact URLs are served
+        self.send_error(404, "File not found")
+        return None
+
+    def send_head(self):
+        self._range_remaining = None
+        range_header = self.headers.get("Range")
+        path = self.translate_path(self.path)
+        if not range_header or os.path.isdir(path):
+            return super().send_head()
+
+        match = RANGE_PATTERN.match(range_header.strip())
+        if not match:
+            return super().send_head()
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        size = os.fstat(f.fileno()).st_size
+        start, end = match.groups()
+        if start == "":
+            start = max(0, size - int(end or 0))
+            end = size - 1
+        else:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return None
+
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        f.seek(start)
+        self._range_remaining = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        remaining = getattr(self, "_range_remaining", None)
+        if remaining is None:
+            return super().copyfile(source, outputfile)
+        while remaining > 0:
+            chunk = source.read(min(RANGE_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+
+class PreviewServer:
+    """Background HTTP server rooted at PREVIEW_STATIC_ROOT."""
+
+    def __init__(self, root: str = PREVIEW_STATIC_ROOT, host: str = PREVIEW_SERVER_HOST,
+                 port: int = PREVIEW_SERVER_PORT, public_base_url: str = PREVIEW_PUBLIC_BASE_URL):
+        # Sweeps leftovers from earlier runs and starts enforcing the budget
+        get_static_cache()
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        handler = partial(RangeRequestHandler, directory=os.path.abspath(root))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        bound_host, bound_port = self.httpd.server_address[:2]
+        self.base_url = (public_base_url or f"http://{bound_host}:{bound_port}").rstrip("/")
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="filematcher-preview", daemon=True)
+        self.thread.start()
+
+    def url_for(self, rel_path: str) -> str:
+        return f"{self.base_url}/{quote(rel_path.replace(os.sep, '/'))}"
+
+
+_preview_server = None
+_preview_server_lock = threading.Lock()
+
+
+def get_preview_server() -> PreviewServer:
+    """Process-wide preview server, started on first use."""
+    global _preview_server
+    with _preview_server_lock:
+        if _preview_server is None:
+            _preview_server = PreviewServer()
+        return _preview_server
+
+
+def spool_media_file(data, ext: str, digest: str = None) -> str:
+    """
+    Write media bytes (bytes or a zero-copy memoryview) once to
+    `<static root>/media/<sha256><ext>` and return the path relative to the root.
+    """
+    cache = get_static_cache()
+    digest = digest or hashlib.sha256(data).hexdigest()
+    rel_path = f"{STATIC_MEDIA_DIR}/{digest}{ext.lower()}"
+    if not cache.touch(rel_path):
+        dest = os.path.join(cache.root, *rel_path.split("/"))
+        tmp_dest = f"{dest}{TMP_MARKER}{threading.get_ident()}"
+        with open(tmp_dest, "wb") as out:
+            out.write(data)
+        os.replace(tmp_dest, dest)
+        cache.add(rel_path)
+    return rel_path
+
+
+def static_media_url(data, ext: str, digest: str = None) -> str:
+    """
+    URL on the local preview server that streams the media with range support.
+    Pass the content `digest` when it is already known to skip re-hashing.
+    """
+    return get_preview_server().url_for(spool_media_file(data, ext, digest))
+
+
+def static_preview_url(zip_bytes: bytes, digest: str = None):
+    """
+    Extract an HTML5 zip into the content-addressed cache and return
+    (url_of_entry_html, error) served by the local preview server.
+    """
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        zip_names = [n for n in zf.namelist() if not n.endswith("/")]
+    if not zip_names:
+        return None, "This zip file is empty."
+
+    entry_html = find_html_entry([n for n in zip_names if safe_member_path(n)])
+    if not entry_html:
+        return None, "No HTML entry file found in zip."
+
+    digest, _ = extract_zip_to_cache(zip_bytes, digest)
+    return get_preview_server().url_for(f"{digest}/{entry_html}"), None
+
+
+# -----------------------------
+# Delivery zips
+# -----------------------------
+JUNK_MEMBER_PREFIX = "__MACOSX/"
+JUNK_MEMBER_NAMES = {".DS_Store", "Thumbs.db", "desktop.ini"}
+
+
+class DeliveryMember(NamedTuple):
+    name: str  # basename, what expected names are matched against
+    path: str  # full path inside the archive
+    archive: int  # index of the uploaded zip it came from
+    size: int
+    compressed_size: int
+
+
+def list_delivery_members(fileobj, archive: int = 0) -> list:
+    """
+    Files inside a delivery zip, read from the central directory only.
+
+    Nothing is decompressed, so listing costs the same for a 5 MB and a
+    5 GB archive. Folders and OS junk (`__MACOSX/`, `.DS_Store`) are skipped.
+    """
+    members = []
+    with zipfile.ZipFile(fileobj, "r") as zf:
+        for info in zf.infolist():
+            path = normalize_zip_path(info.filename)
+            name = path.rsplit("/", 1)[-1]
+            if info.is_dir() or not name or path.startswith(JUNK_MEMBER_PREFIX) or name in JUNK_MEMBER_NAMES:
+                continue
+            members.append(DeliveryMember(name, info.filename, archive, info.file_size, info.compress_size))
+    return members
+
+
+def read_delivery_member(fileobj, path: str) -> bytes:
+    """Decompress a single member of a delivery zip (subject to ZipBudget limits)."""
+    with zipfile.ZipFile(fileobj, "r") as zf:
+        return ZipBudget().read(zf, zf.getinfo(path))
+
+
+def open_delivery_member(zf: zipfile.ZipFile, path: str):
+    """
+    Stream a delivery-zip member for the hasher and header probes. Each member
+    gets its own ZipBudget, as in read_delivery_member, so the ratio check
+    applies without a whole delivery counting against one allowance.
+    """
+    return ZipBudget().open(zf, zf.getinfo(path))
+
+
+# -----------------------------
+# Expected-name sheets
+# -----------------------------
+SHEET_EXTS = {".csv", ".tsv", ".txt", ".xlsx", ".xlsm"}
+EXCEL_EXTS = {".xlsx", ".xlsm"}
+CSV_SNIFF_BYTES = 64 * 1024
+
+
+def iter_sheet_rows(fileobj, filename: str):
+    """
+    Yield rows of a CSV/TSV or the first worksheet of an Excel file, one at a time.
+
+    Excel is read with openpyxl in read-only mode, which streams rows from
+    the XML instead of loading the whole workbook.
+    """
+    if os.path.splitext(filename.lower())[1] in EXCEL_EXTS:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("Reading Excel sheets requires openpyxl (pip install openpyxl).")
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            yield from wb.active.iter_rows(values_only=True)
+        finally:
+            wb.close()
+        return
+
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        sample = text.read(CSV_SNIFF_BYTES)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(text, dialect)
+    finally:
+        text.detach()  # leave the caller's file object open
+
+
+def sheet_columns(fileobj, filename: str) -> list:
+    """Header cells of the first row, with blanks labelled by position."""
+    first = next(iter_sheet_rows(fileobj, filename), None) or []
+    return [
+        str(cell).strip() if cell not in (None, "") else f"Column {i + 1}"
+        for i, cell in enumerate(first)
+    ]
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel stores numeric codes as floats
+    return str(value).strip()
+
+
+def expected_names_from_sheet(fileobj, filename: str, columns, has_header: bool = True) -> frozenset:
+    """Distinct non-empty values of the given column indexes, read row by row."""
+    rows = iter_sheet_rows(fileobj, filename)
+    if has_header:
+        next(rows, None)
+    names = set()
+    for row in rows:
+        for c in columns:
+            if c < len(row):
+                text = _cell_text(row[c])
+                if text:
+                    names.add(text)
+    return frozenset(names)
+
+
+# -----------------------------
+# Duplicate content
+# -----------------------------
+HASH_CHUNK_BYTES = 1024 * 1024
+HASH_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+
+class HashEntry(NamedTuple):
+    label: str  # shown in the report
+    size: int
+    cache_key: tuple  # e.g. (file_id, name, size); digests are reused across reruns under this key
+    source: object  # callable returning a readable file object or a bytes-like buffer
+
+
+def hash_source(source) -> str:
+    """sha256 of a file object (read in chunks) or buffer (hashed in zero-copy slices)."""
+    digest = hashlib.sha256()
+    if hasattr(source, "read"):
+        with source:
+            for chunk in iter(partial(source.read, HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+    else:
+        view = memoryview(source)
+        for start in range(0, len(view), HASH_CHUNK_BYTES):
+            digest.update(view[start:start + HASH_CHUNK_BYTES])
+    return digest.hexdigest()
+
+
+def duplicate_clusters(entries, cache: dict) -> list:
+    """
+    Groups of entries with byte-identical content, largest files first.
+
+    Only entries whose size collides with another entry are hashed, on a
+    thread pool (sha256 and zlib release the GIL). Digests are stored in
+    `cache` under each entry's cache_key so reruns hash nothing; a key shared
+    by several entries of the batch is ambiguous, so those entries are
+    hashed every time and never cached.
+    Returns [(sha256, [HashEntry, ...]), ...].
+    """
+    by_size = defaultdict(list)
+    for entry in entries:
+        by_size[entry.size].append(entry)
+    candidates = [e for group in by_size.values() if len(group) > 1 for e in group]
+
+    key_counts = defaultdict(int)
+    for entry in candidates:
+        key_counts[entry.cache_key] += 1
+    shared = {key for key, count in key_counts.items() if count > 1}
+
+    digests = [cache.get(e.cache_key) if e.cache_key not in shared else None for e in candidates]
+    todo = [i for i, digest in enumerate(digests) if digest is None]
+    if todo:
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="content-hash") as pool:
+            for i, digest in zip(todo, pool.map(lambda i: hash_source(candidates[i].source()), todo)):
+                digests[i] = digest
+                if candidates[i].cache_key not in shared:
+                    cache[candidates[i].cache_key] = digest
+
+    by_digest = defaultdict(list)
+    for entry, digest in zip(candidates, digests):
+        by_digest[(entry.size, digest)].append(entry)
+    clusters = [(digest, group) for (_, digest), group in by_digest.items() if len(group) > 1]
+    clusters.sort(key=lambda c: (-c[1][0].size, c[0]))
+    return clusters
+
+
+# -----------------------------
+# Match report
+# -----------------------------
+MATCH_STATUSES = ("Missing", "Extra", "Matched")
+
+
+def match_report(expected, uploaded, locations: dict = None) -> pd.DataFrame:
+    """
+    One row per name with its Status (Missing / Extra / Matched), sorted by
+    status then name. `locations` optionally maps a name to where it was
+    found (e.g. its path inside a delivery zip).
+    """
+    expected = set(expected)
+    uploaded = set(uploaded)
+    names, statuses = [], []
+    for name in expected:
+        names.append(name)
+        statuses.append("Matched" if name in uploaded else "Missing")
+    for name in uploaded - expected:
+        names.append(name)
+        statuses.append("Extra")
+
+    report = pd.DataFrame({
+        "Status": pd.Categorical(statuses, categories=MATCH_STATUSES, ordered=True),
+        "File name": names,
+    })
+    if locations:
+        report["Location"] = report["File name"].map(locations)
+    return report.sort_values(["Status", "File name"], ignore_index=True)
+
+
+def report_to_csv(report: pd.DataFrame) -> bytes:
+    return report.to_csv(index=False).encode("utf-8-sig")
+
+
+def report_to_xlsx(report: pd.DataFrame, sheet_name: str = "Match report") -> bytes:
+    """Streamed with openpyxl's write-only mode, about twice as fast as DataFrame.to_excel."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in report.columns])
+    cells = report.astype(object).where(report.notna(), None)
+    for row in cells.itertuples(index=False, name=None):
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+# -----------------------------
+# Fuzzy name matching
+# -----------------------------
+NAME_SEPARATORS = re.compile(r"[\s_\-.]+")
+NAME_VERSION_SUFFIX = re.compile(r"[\s_\-.]v\d+$", re.IGNORECASE)
+FUZZY_MIN_SCORE = 0.6
+FUZZY_MAX_EDITS = 2
+FUZZY_SHARED_TRIGRAMS = 6
+FUZZY_CANDIDATES_PER_NAME = 3
+
+
+class NameNormalizer:
+    """
+    Canonical form of a filename for fuzzy comparison.
+
+    Each rule can be switched off: case folding, collapsing runs of
+    separators (space, `_`, `-`, `.`), dropping a trailing `_v2`-style
+    version suffix and ignoring the extension.
+    """
+
+    def __init__(self, ignore_case=True, unify_separators=True, strip_version=True, ignore_extension=False):
+        self.ignore_case = ignore_case
+        self.unify_separators = unify_separators
+        self.strip_version = strip_version
+        self.ignore_extension = ignore_extension
+
+    def __call__(self, name: str) -> str:
+        stem, ext = os.path.splitext(name.strip())
+        if self.strip_version:
+            stem = NAME_VERSION_SUFFIX.sub("", stem)
+        key = stem if self.ignore_extension else stem + ext
+        if self.ignore_case:
+            key = key.casefold()
+        if self.unify_separators:
+            key = NAME_SEPARATORS.sub("_", key).strip("_")
+        return key
+
+
+def name_trigrams(key: str) -> frozenset:
+    padded = f"\x02\x02{key}\x03\x03"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigram_similarity(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient of two trigram sets."""
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over normalized names.
+
+    k edits destroy at most 3k of a name's trigrams, so a name within
+    `max_edits` edits of the query shares at least FUZZY_SHARED_TRIGRAMS of
+    the query's 3k + FUZZY_SHARED_TRIGRAMS rarest trigrams. Queries count
+    hits over just those posting lists (numpy bincount) and only names that
+    pass the count are scored, so the trigrams every file in a delivery
+    shares (`_en`, `300`, the year) never turn a lookup into a full scan.
+    """
+
+    def __init__(self, keys, max_edits: int = FUZZY_MAX_EDITS):
+        self.keys = list(keys)
+        self.max_edits = max_edits
+        self.grams = [name_trigrams(k) for k in self.keys]
+
+        postings = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def candidates(self, grams) -> np.ndarray:
+        lists = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        # Trigrams no indexed name has are already part of the 3k an edit may destroy
+        allowed_lost = 3 * self.max_edits - (len(grams) - len(lists))
+        if allowed_lost < 0 or not lists:
+            return np.empty(0, dtype=np.int32)
+        lists = lists[:allowed_lost + FUZZY_SHARED_TRIGRAMS]
+        min_shared = max(1, len(lists) - allowed_lost)
+        hits = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+        return np.flatnonzero(hits >= min_shared)
+
+    def query(self, key: str, min_score: float = FUZZY_MIN_SCORE, limit: int = FUZZY_CANDIDATES_PER_NAME):
+        """Best [(index, score), ...] with Dice >= min_score, highest first."""
+        grams = name_trigrams(key)
+        scored = []
+        for i in self.candidates(grams).tolist():
+            score = trigram_similarity(grams, self.grams[i])
+            if score >= min_score:
+                scored.append((i, score))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+
+class FuzzyMatch(NamedTuple):
+    missing: str
+    extra: str
+    score: float
+
+
+def suggest_pairings(
+    missing,
+    extra,
+    normalizer: NameNormalizer = None,
+    min_score: float = FUZZY_MIN_SCORE,
+    max_edits: int = FUZZY_MAX_EDITS,
+):
+    """
+    One-to-one missing -> extra pairings as FuzzyMatch, best score first.
+
+    Names that become identical after normalization pair with score 1.0;
+    the rest are looked up in a TrigramIndex over the extra names and
+    assigned greedily so each extra file is suggested at most once.
+    """
+    normalizer = normalizer or NameNormalizer()
+    missing = sorted(missing)
+    extra = sorted(extra)
+
+    by_key = defaultdict(list)
+    for name in reversed(extra):
+        by_key[normalizer(name)].append(name)
+
+    pairings = []
+    unmatched = []
+    for name in missing:
+        key = normalizer(name)
+        if by_key.get(key):
+            pairings.append(FuzzyMatch(name, by_key[key].pop(), 1.0))
+        else:
+            unmatched.append((name, key))
+
+    rest = [(name, key) for key, names in by_key.items() for name in names]
+    if not unmatched or not rest:
+        return pairings
+
+    index = TrigramIndex([key for _, key in rest], max_edits)
+    candidates = []
+    for i, (_, key) in enumerate(unmatched):
+        candidates.extend((score, i, j) for j, score in index.query(key, min_score))
+
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+    used_missing, used_extra = set(), set()
+    for score, i, j in candidates:
+        if i in used_missing or j in used_extra:
+            continue
+        used_missing.add(i)
+        used_extra.add(j)
+        pairings.append(FuzzyMatch(unmatched[i][0], rest[j][0], round(score, 3)))
+    return pairings
+
+
+# -----------------------------
+# Deep validation
+# -----------------------------
+# What a name claims: `300x250` and `15s`
+SIZE_TOKEN = re.compile(r"(?<!\d)(\d{2,4})\s*[x×]\s*(\d{2,4})(?!\d)", re.IGNORECASE)
+DURATION_TOKEN = re.compile(r"(?<![\da-z])(\d{1,3})\s*(?:s|sec|secs)(?![a-z])", re.IGNORECASE)
+DURATION_TOLERANCE_S = 0.5
+
+VALIDATION_IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+VALIDATION_MP4_EXTS = {".mp4", ".mov", ".m4v"}
+VALIDATION_VIDEO_EXTS = VALIDATION_MP4_EXTS | {".webm"}
+# Platform weight caps in KB per asset kind; overridable from the UI
+DEFAULT_WEIGHT_CAPS_KB = {"image": 150, "video": 10 * 1024, "zip": 200}
+
+IMAGE_PROBE_BYTES = 32  # enough for PNG/GIF/WebP; JPEG hops to its SOF segment
+MOOV_PROBE_LIMIT = 8 * 1024 * 1024
+# Delivery-zip probes inflate compressed members (all of `mdat` when `moov`
+# comes last); zlib releases the GIL, so threads read members side by side
+VALIDATION_WORKERS = min(8, os.cpu_count() or 4)
+
+_validation_pool = None
+_validation_pool_lock = threading.Lock()
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class ValidationJob(NamedTuple):
+    name: str
+    size: int
+    probe: bytes  # image header or MP4 `moov` box; empty when not needed
+    error: str = ""  # why the probe could not be read, e.g. a ZipBudget limit
+
+
+def asset_kind(name: str) -> str:
+    ext = os.path.splitext(name.lower())[1]
+    if ext in VALIDATION_IMAGE_EXTS:
+        return "image"
+    if ext in VALIDATION_VIDEO_EXTS:
+        return "video"
+    if ext == ".zip":
+        return "zip"
+    return "other"
+
+
+def parse_size_token(name: str):
+    m = SIZE_TOKEN.search(name)
+    return (int(m.group(1)), int(m.group(2))) if m else None
+
+
+def parse_duration_token(name: str):
+    m = DURATION_TOKEN.search(os.path.splitext(name)[0])
+    return int(m.group(1)) if m else None
+
+
+def image_dimensions(head: bytes):
+    """(width, height) from the first bytes of a PNG, GIF, WebP or JPEG, else None."""
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", head[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+        return None
+    if head[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 <= len(head):
+            if head[i] != 0xFF:
+                i += 1
+                continue
+            marker = head[i + 1]
+            if marker == 0xFF:  # fill byte
+                i += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # standalone markers carry no length
+                i += 2
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                h, w = struct.unpack(">HH", head[i + 5:i + 9])
+                return w, h
+            i += 2 + struct.unpack(">H", head[i + 2:i + 4])[0]
+    return None
+
+
+def read_jpeg_header(fileobj) -> bytes:
+    """
+    Hop JPEG segment headers up to the frame header (SOF) and return
+    SOI + SOF, skipping EXIF/ICC blocks without reading them.
+    """
+    if fileobj.read(2) != b"\xff\xd8":
+        return b""
+    while True:
+        byte = fileobj.read(1)
+        if not byte:
+            return b""
+        if byte != b"\xff":
+            continue
+        marker = fileobj.read(1)
+        while marker == b"\xff":
+            marker = fileobj.read(1)
+        if not marker:
+            return b""
+        if marker[0] == 0x01 or 0xD0 <= marker[0] <= 0xD8:
+            continue
+        length_bytes = fileobj.read(2)
+        if len(length_bytes) < 2:
+            return b""
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker[0] in JPEG_SOF_MARKERS:
+            return b"\xff\xd8\xff" + marker + length_bytes + fileobj.read(length - 2)
+        fileobj.seek(length - 2, io.SEEK_CUR)
+
+
+def read_mp4_moov(fileobj, size: int):
+    """
+    Return the `moov` box payload by hopping over top-level box headers,
+    so only a few bytes per box are read even when `moov` sits after `mdat`.
+    """
+    pos = 0
+    while pos + 8 <= size:
+        fileobj.seek(pos)
+        header = fileobj.read(16)
+        if len(header) < 8:
+            return None
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        header_len = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", header[8:16])[0]
+            header_len = 16
+        elif box_size == 0:
+            box_size = size - pos
+        if box_type == b"moov":
+            fileobj.seek(pos + header_len)
+            return fileobj.read(min(box_size - header_len, MOOV_PROBE_LIMIT))
+        if box_size < header_len:
+            return None
+        pos += box_size
+    return None
+
+
+def _iter_boxes(data: bytes, start: int, end: int):
+    while start + 8 <= end:
+        box_size, box_type = struct.unpack(">I4s", data[start:start + 8])
+        header_len = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", data[start + 8:start + 16])[0]
+            header_len = 16
+        elif box_size == 0:
+            box_size = end - start
+        if box_size < header_len:
+            return
+        yield box_type, start + header_len, min(start + box_size, end)
+        start += box_size
+
+
+def mp4_info(moov: bytes):
+    """(duration_seconds, (width, height)) from a `moov` payload; either may be None."""
+    duration, dims = None, None
+    for box_type, start, end in _iter_boxes(moov, 0, len(moov)):
+        if box_type == b"mvhd":
+            if moov[start] == 1:
+                timescale, length = struct.unpack(">IQ", moov[start + 20:start + 32])
+            else:
+                timescale, length = struct.unpack(">II", moov[start + 12:start + 20])
+            if timescale:
+                duration = length / timescale
+        elif box_type == b"trak":
+            for child, c_start, _ in _iter_boxes(moov, start, end):
+                if child != b"tkhd":
+                    continue
+                offset = c_start + (88 if moov[c_start] == 1 else 76)
+                w, h = struct.unpack(">II", moov[offset:offset + 8])
+                if w and h and dims is None:  # audio tracks are 0x0
+                    dims = (w >> 16, h >> 16)
+    return duration, dims
+
+
+def read_validation_probe(fileobj, name: str, size: int) -> bytes:
+    """The few bytes validate_creative needs: an image header or the MP4 `moov` box."""
+    ext = os.path.splitext(name.lower())[1]
+    try:
+        if ext in (".jpg", ".jpeg"):
+            return read_jpeg_header(fileobj)
+        if ext in VALIDATION_IMAGE_EXTS:
+            return fileobj.read(IMAGE_PROBE_BYTES)
+        if ext in VALIDATION_MP4_EXTS:
+            return read_mp4_moov(fileobj, size) or b""
+    except Exception:
+        pass
+    return b""
+
+
+def validation_job(fileobj, name: str, size: int) -> ValidationJob:
+    return ValidationJob(name, size, read_validation_probe(fileobj, name, size))
+
+
+def _get_validation_pool() -> ThreadPoolExecutor:
+    global _validation_pool
+    with _validation_pool_lock:
+        if _validation_pool is None:
+            _validation_pool = ThreadPoolExecutor(max_workers=VALIDATION_WORKERS, thread_name_prefix="validation")
+        return _validation_pool
+
+
+def _probe_delivery_members(archive_bytes: bytes, members) -> list:
+    # Own ZipFile over its own BytesIO: members are read without sharing a file position
+    jobs = []
+    with zipfile.ZipFile(io.BytesIO(archive_bytes), "r") as zf:
+        for m in members:
+            try:
+                member = open_delivery_member(zf, m.path)
+            except ZipLimitError as e:
+                jobs.append(ValidationJob(m.name, m.size, b"", str(e)))
+                continue
+            with member:
+                jobs.append(validation_job(member, m.name, m.size))
+    return jobs
+
+
+def delivery_validation_jobs(fileobj, members, workers: int = VALIDATION_WORKERS) -> list:
+    """
+    Probe delivery-zip members; each one is only decompressed as far as its
+    header. Members are dealt round-robin to up to `workers` threads, each
+    with its own ZipFile, and the jobs come back in `members` order.
+    """
+    # BytesIO.getvalue shares the upload's buffer; every BytesIO over it does too
+    archive_bytes = fileobj.getvalue()
+    stripes = [members[i::workers] for i in range(min(workers, len(members)))]
+    if len(stripes) <= 1:
+        return _probe_delivery_members(archive_bytes, members)
+
+    pool = _get_validation_pool()
+    futures = [pool.submit(_probe_delivery_members, archive_bytes, stripe) for stripe in stripes]
+    jobs = [None] * len(members)
+    for i, future in enumerate(futures):
+        jobs[i::len(stripes)] = future.result()
+    return jobs
+
+
+def validate_creative(job: ValidationJob, caps_kb: dict) -> dict:
+    """Check one asset against its own name."""
+    kind = asset_kind(job.name)
+    expected_dims = parse_size_token(job.name)
+    expected_duration = parse_duration_token(job.name) if kind == "video" else None
+    actual_dims, actual_duration = None, None
+    checks, notes = [], []
+
+    if job.error:
+        notes.append(job.error)
+    elif kind == "image":
+        actual_dims = image_dimensions(job.probe)
+        if actual_dims is None:
+            notes.append("unreadable image header")
+    elif kind == "video" and job.probe:
+        try:
+            actual_duration, actual_dims = mp4_info(job.probe)
+        except (struct.error, IndexError):  # truncated or corrupt box
+            notes.append("unreadable moov box")
+    elif kind == "video":
+        notes.append("duration not checked for this container")
+
+    if expected_dims and actual_dims:
+        checks.append(tuple(actual_dims) == expected_dims)
+        if not checks[-1]:
+            notes.append(f"is {actual_dims[0]}x{actual_dims[1]}")
+    if expected_duration is not None and actual_duration is not None:
+        checks.append(abs(actual_duration - expected_duration) <= DURATION_TOLERANCE_S)
+        if not checks[-1]:
+            notes.append(f"runs {actual_duration:.2f}s")
+
+    cap_kb = caps_kb.get(kind)
+    if cap_kb:
+        checks.append(job.size <= cap_kb * 1024)
+        if not checks[-1]:
+            notes.append(f"over {cap_kb} KB cap")
+
+    if not checks:
+        status = "Not checked"
+    else:
+        status = "Pass" if all(checks) else "Fail"
+
+    return {
+        "Status": status,
+        "File name": job.name,
+        "Kind": kind,
+        "Size (KB)": round(job.size / 1024, 1),
+        "Expected size": f"{expected_dims[0]}x{expected_dims[1]}" if expected_dims else "",
+        "Actual size": f"{actual_dims[0]}x{actual_dims[1]}" if actual_dims else "",
+        "Expected duration (s)": expected_duration,
+        "Actual duration (s)": round(actual_duration, 2) if actual_duration is not None else None,
+        "Notes": "; ".join(notes),
+    }
+
+
+def validate_creatives(jobs, caps_kb: dict = None) -> list:
+    """
+    Validate many assets in order. The cost is in reading the probes (see
+    read_validation_probe); checking a probe takes ~15 µs, so this runs inline.
+    """
+    caps_kb = caps_kb if caps_kb is not None else DEFAULT_WEIGHT_CAPS_KB
+    return [validate_creative(job, caps_kb) for job in jobs]
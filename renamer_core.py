@@ -0,0 +1,243 @@
+"""
+Non-UI helpers for BulkCreativeRenamer.py and NameTheFile.py.
+
+Both pages parse creative names of the form
+    year_client_lob_lang_campaign_message_size_<date>[_vN].ext
+and differ only in where the version suffix is split off. Each layout has a
+per-name parser (`parse_*_filename`, the reference behaviour) and a
+vectorized one over a whole zip listing (`parse_*_filenames`) that must
+return exactly the same values; benchmarks/bench_filename_parsing.py checks
+the two against each other.
+"""
+import re
+from pathlib import PurePosixPath
+
+import pandas as pd
+
+
+def split_stem_and_ext(filename: str):
+    p = PurePosixPath(filename)
+    return p.stem, p.suffix
+
+
+def split_member_paths(paths) -> pd.DataFrame:
+    """
+    Vectorized `PurePosixPath(path).parent / .name / .stem / .suffix` over zip member paths.
+    """
+    paths = pd.Series(list(paths), dtype=str)
+    # Paths PurePosixPath would normalize (`a//b`, `./a`, `a/./b`, `/a`, `a/.`).
+    # Rare in real archives; those rows take the slow path.
+    unnormalized = (
+        paths.str.contains("//", regex=False)
+        | paths.str.contains("/./", regex=False)
+        | paths.str.startswith(("/", "./"))
+        | paths.str.endswith("/.")
+        | (paths == ".")
+    )
+
+    split = paths.str.rsplit("/", n=1, expand=True).reindex(columns=[0, 1])
+    has_folder = split[1].notna()
+    filename = split[1].where(has_folder, split[0])
+    folder = split[0].where(has_folder, "")
+
+    if unnormalized.any():
+        slow = paths[unnormalized].map(PurePosixPath)
+        filename[unnormalized] = slow.map(lambda p: p.name)
+        folder[unnormalized] = slow.map(lambda p: "" if str(p.parent) == "." else str(p.parent))
+
+    # PurePosixPath.suffix: from the last dot, unless the dot leads or ends the name
+    dot = filename.str.rsplit(".", n=1, expand=True).reindex(columns=[0, 1])
+    has_ext = (dot[0] != "") & (dot[1] != "") & dot[1].notna()
+    return pd.DataFrame(
+        {
+            "original_path": paths,
+            "folder": folder,
+            "original_filename": filename,
+            "stem": dot[0].where(has_ext, filename),
+            "ext": ("." + dot[1]).where(has_ext, ""),
+        }
+    )
+
+
+def _split_version(values: pd.Series, pattern: re.Pattern, allow_empty_base: bool):
+    """
+    Vectorized `pattern.match(value)` for the `<base>[_vN]` patterns below,
+    as (base, version) with the unmatched fallback (value, "") applied.
+
+    A version can only start at the last underscore, so this is an rsplit plus
+    a check of the tail. Values containing a newline, where `.` and `$` make
+    the regex behave differently, go through the pattern itself.
+    """
+    tail = values.str.rsplit("_", n=1, expand=True).reindex(columns=[0, 1])
+    # `v\d+` without a regex: str.isdecimal is Python's Unicode \d on every string backend
+    version_tail = tail[1].fillna("")
+    is_version = (version_tail.str[:1].str.lower() == "v") & version_tail.str[1:].str.isdecimal()
+    if not allow_empty_base:
+        is_version &= tail[0] != ""
+    base = tail[0].where(is_version, values)
+    version = tail[1].where(is_version, "")
+
+    multiline = values.str.contains("\n", regex=False)
+    if multiline.any():
+        m = values[multiline].str.extract(pattern)
+        base[multiline] = m.iloc[:, 0].fillna(values[multiline])
+        version[multiline] = m.iloc[:, 1].fillna("")
+    return base, version
+
+
+def _split_components(values: pd.Series, components) -> pd.DataFrame:
+    # maxsplit keeps everything after the 7th underscore in the last component,
+    # which is what "_".join(parts[7:]) does; shorter names fill left to right.
+    split = values.str.split("_", n=len(components) - 1, expand=True)
+    split = split.reindex(columns=range(len(components))).fillna("")
+    split.columns = components
+    return split
+
+
+# -----------------------------
+# BulkCreativeRenamer: version split off the stem
+# -----------------------------
+VERSION_SUFFIX_PATTERN = re.compile(r"^(.*?)(?:_(v\d+))?$", re.IGNORECASE)
+
+BULK_COMPONENTS = [
+    "year",
+    "client",
+    "lob",
+    "lang",
+    "campaign",
+    "message",
+    "size",
+    "date_part",
+]
+
+
+def parse_bulk_filename(filename: str):
+    stem, ext = split_stem_and_ext(filename)
+
+    m = VERSION_SUFFIX_PATTERN.match(stem)
+    if m:
+        base_stem = m.group(1) or ""
+        version = m.group(2) or ""
+    else:
+        base_stem = stem
+        version = ""
+
+    parts = base_stem.split("_")
+
+    parsed = {k: "" for k in BULK_COMPONENTS}
+    parsed["ext"] = ext
+    parsed["version"] = version
+
+    if len(parts) >= 8:
+        parsed["year"] = parts[0]
+        parsed["client"] = parts[1]
+        parsed["lob"] = parts[2]
+        parsed["lang"] = parts[3]
+        parsed["campaign"] = parts[4]
+        parsed["message"] = parts[5]
+        parsed["size"] = parts[6]
+        parsed["date_part"] = "_".join(parts[7:])
+    else:
+        for i, key in enumerate(BULK_COMPONENTS[:len(parts)]):
+            parsed[key] = parts[i]
+
+    return parsed
+
+
+def parse_bulk_filenames(paths) -> pd.DataFrame:
+    """
+    `load_zip_to_records` rows for every member path at once; same values as
+    `parse_bulk_filename` on each name.
+    """
+    members = split_member_paths(paths)
+    base_stem, version = _split_version(members["stem"], VERSION_SUFFIX_PATTERN, allow_empty_base=True)
+
+    return pd.concat(
+        [
+            members[["original_path", "folder", "original_filename"]],
+            _split_components(base_stem, BULK_COMPONENTS),
+            pd.DataFrame({"ext": members["ext"], "version": version}),
+        ],
+        axis=1,
+    )
+
+
+# -----------------------------
+# NameTheFile: version split off the date component
+# -----------------------------
+VERSION_PATTERN = re.compile(r"^(?P<base>.+?)(?:_(?P<version>v\d+))?$", re.IGNORECASE)
+
+NAME_COMPONENTS = [
+    "year",
+    "client",
+    "lob",
+    "lang",
+    "campaign",
+    "message",
+    "size",
+    "date_version",
+]
+
+
+def parse_named_filename(filename: str):
+    """
+    Expected filename structure:
+    2026_RCI_RWI_EN_Q1 Samsung NPI Launch_Double Your Storage COV QC_320x50_Mar.10.2026.png
+
+    Parsed as:
+    year_client_lob_lang_campaign_message_size_dateversion.ext
+    """
+    stem, ext = split_stem_and_ext(filename)
+    parts = stem.split("_")
+
+    parsed = {k: "" for k in NAME_COMPONENTS}
+    parsed["ext"] = ext
+
+    if len(parts) >= 8:
+        parsed["year"] = parts[0]
+        parsed["client"] = parts[1]
+        parsed["lob"] = parts[2]
+        parsed["lang"] = parts[3]
+        parsed["campaign"] = parts[4]
+        parsed["message"] = parts[5]
+        parsed["size"] = parts[6]
+        parsed["date_version"] = "_".join(parts[7:])
+    else:
+        for i, key in enumerate(NAME_COMPONENTS[:len(parts)]):
+            parsed[key] = parts[i]
+
+    m = VERSION_PATTERN.match(parsed["date_version"])
+    if m:
+        parsed["date"] = m.group("base") or ""
+        parsed["version"] = m.group("version") or ""
+    else:
+        parsed["date"] = parsed["date_version"]
+        parsed["version"] = ""
+
+    return parsed
+
+
+def parse_named_filenames(paths) -> pd.DataFrame:
+    """
+    `load_zip_to_records` rows for every member path at once; same values as
+    `parse_named_filename` on each name.
+    """
+    members = split_member_paths(paths)
+    components = _split_components(members["stem"], NAME_COMPONENTS)
+    date, version = _split_version(components["date_version"], VERSION_PATTERN, allow_empty_base=False)
+
+    return pd.concat(
+        [
+            pd.DataFrame({"selected": True}, index=members.index),
+            members[["original_path", "folder", "original_filename"]],
+            components,
+            pd.DataFrame(
+                {
+                    "ext": members["ext"],
+                    "date": date,
+                    "version": version,
+                }
+            ),
+        ],
+        axis=1,
+    )